@@ -0,0 +1,207 @@
+"""Stand-in for the BC Ferries schedule pages, to load test the server without sending requests to BC Ferries.
+
+Serves the pages of the parser corpus in `benchmarks/corpus` (see `parser_corpus.py`): each route gets one of its
+daily pages, seasonal routes get its seasonal page while it covers today, and dates more than `--posted-days` ahead
+get one of its pages without sailings. Seasonal pages that the corpus does not have, such as the next season linked
+from a seasonal page, are made by `synthetic.py`, and so is every page with `--no-corpus`.
+Responses have a simulated latency, random server errors, and status 429 above a rate limit.
+Request counts, and how many pages came from the corpus, are served at `/stats`.
+Run from the repository root and point `schedules.base_url` at `http://127.0.0.1:8001/routes-fares/schedules/daily/`:
+
+    python benchmarks/fake_upstream.py --port 8001 --latency 0.2 --error-rate 0.02 --rate-limit 20
+"""
+
+import argparse
+import asyncio
+import functools
+import random
+import time
+import zlib
+from collections import Counter
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from parser_corpus import load_corpus
+from synthetic import make_no_sailings_page, make_schedule, make_schedule_page, make_seasonal_page
+
+from ferry_planner.config import CONFIG
+from ferry_planner.schedule import NO_SAILINGS_MESSAGES
+
+
+def is_no_sailings_page(html: str, /) -> bool:
+    return any(message in html for message in NO_SAILINGS_MESSAGES)
+
+
+def parse_seasonal_name(name: str, /) -> tuple[str, datetime, datetime]:
+    """Return the route and the first and last dates of a seasonal page named like "TSA-SWB_20261001-20261231"."""
+    route, _, dates = name.partition("_")
+    start, end = (datetime.strptime(x, "%Y%m%d").replace(tzinfo=CONFIG.timezone) for x in dates.split("-"))
+    return route, start, end
+
+
+def covers(name: str, date: datetime, /) -> bool:
+    _, start, end = parse_seasonal_name(name)
+    return start <= date <= end
+
+
+class FakeUpstream:
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        latency: float,
+        error_rate: float,
+        rate_limit: float,
+        seasonal_share: float,
+        posted_days: int,
+        filler_kb: int,
+        corpus: Sequence[tuple[str, str]] = (),
+    ) -> None:
+        """`corpus` has the URL and HTML of the pages to serve instead of synthetic ones."""
+        self.latency = latency
+        """Mean seconds before responding, each response takes between half and one and a half times as long."""
+        self.error_rate = error_rate
+        """Share of requests that fail with status 500 or 503."""
+        self.rate_limit = rate_limit
+        """Requests per second answered before responding with status 429, 0 for no limit."""
+        self.seasonal_share = seasonal_share
+        """Share of routes with seasonal schedules."""
+        self.posted_days = posted_days
+        self.filler_kb = filler_kb
+        self.stats: Counter[str] = Counter()
+        self._corpus_daily = [html for url, html in corpus if "/daily/" in url and not is_no_sailings_page(html)]
+        self._corpus_no_sailings = [html for _, html in corpus if is_no_sailings_page(html)]
+        self._corpus_seasonal = {
+            httpx.URL(url).path.rpartition("/")[2]: html
+            for url, html in corpus
+            if "/seasonal/" in url and not is_no_sailings_page(html)
+        }
+        """Seasonal pages by the last segment of their URL path."""
+        self._window = 0
+        self._window_requests = 0
+
+    def is_seasonal(self, route: str, /) -> bool:
+        return zlib.crc32(route.encode()) % 100 < self.seasonal_share * 100
+
+    def get_season(self, date: datetime, /) -> tuple[datetime, datetime]:
+        """Return the first and last day of the month of `date`.
+
+        Seasons are a month long, shorter than on BC Ferries, so that trips planned a few days ahead often need
+        the next season.
+        """
+        start = date.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return start, end
+
+    def pick_corpus_page(self, pages: Sequence[str], route: str, /) -> str | None:
+        """Return the same page of `pages` for every request of a route, or `None` if there are no pages."""
+        if not pages:
+            return None
+        self.stats["corpus_pages"] += 1
+        return pages[zlib.crc32(route.encode()) % len(pages)]
+
+    def get_daily_page(self, route: str, date: datetime, /) -> str:
+        today = datetime.now(CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+        if date >= today + timedelta(days=self.posted_days):
+            page = self.pick_corpus_page(self._corpus_no_sailings, route)
+            return page or make_no_sailings_page(NO_SAILINGS_MESSAGES[1], filler_kb=self.filler_kb)
+        if self.is_seasonal(route):
+            # Seasonal routes show the current season, dates in the next one redirect to its page.
+            current_pages = [page for name, page in self._corpus_seasonal.items() if covers(name, today)]
+            page = self.pick_corpus_page(current_pages, route)
+            return page or self.get_seasonal_page(route, *self.get_season(today))
+        page = self.pick_corpus_page(self._corpus_daily, route)
+        if page is not None:
+            return page
+        origin_id, _, destination_id = route.partition("-")
+        return make_schedule_page(make_schedule(origin_id, destination_id, date), filler_kb=self.filler_kb)
+
+    def get_seasonal_page_by_name(self, name: str, /) -> str:
+        page = self._corpus_seasonal.get(name)
+        if page is not None:
+            self.stats["corpus_pages"] += 1
+            return page
+        route, start, end = parse_seasonal_name(name)
+        return self.get_seasonal_page(route, start, end)
+
+    @functools.lru_cache(maxsize=64)  # noqa: B019
+    def get_seasonal_page(self, route: str, start: datetime, end: datetime, /) -> str:
+        origin_id, _, destination_id = route.partition("-")
+        schedule = make_schedule(origin_id, destination_id, start)
+        return make_seasonal_page(schedule, start=start, end=end, filler_kb=self.filler_kb)
+
+    async def respond(self, request: Request, page: str, /) -> Response:
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window = window
+            self._window_requests = 0
+        self._window_requests += 1
+        if self.rate_limit and self._window_requests > self.rate_limit:
+            response = Response(status_code=429, headers={"Retry-After": "1"})
+        elif random.random() < self.error_rate:
+            response = Response(status_code=random.choice((500, 503)))
+        else:
+            etag = f'"{zlib.crc32(page.encode()):08x}"'
+            if request.headers.get("If-None-Match") == etag:
+                response = Response(status_code=304, headers={"ETag": etag})
+            else:
+                response = Response(page, media_type="text/html", headers={"ETag": etag})
+        self.stats["requests"] += 1
+        self.stats[f"status_{response.status_code}"] += 1
+        return response
+
+
+def create_app(upstream: FakeUpstream, /) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/routes-fares/schedules/daily/{route}")
+    async def daily(request: Request, route: str, scheduleDate: str) -> Response:  # noqa: N803
+        upstream.stats["daily"] += 1
+        date = datetime.strptime(scheduleDate, "%m/%d/%Y").replace(tzinfo=CONFIG.timezone)
+        return await upstream.respond(request, upstream.get_daily_page(route, date))
+
+    @app.get("/routes-fares/schedules/seasonal/{page}")
+    async def seasonal(request: Request, page: str) -> Response:
+        upstream.stats["seasonal"] += 1
+        return await upstream.respond(request, upstream.get_seasonal_page_by_name(page))
+
+    @app.get("/stats")
+    async def stats() -> dict[str, int]:
+        return dict(upstream.stats)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic BC Ferries schedule pages.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean seconds before responding")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail with 5xx")
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests per second before 429, 0 for none")
+    parser.add_argument("--seasonal-share", type=float, default=0.2, help="share of routes with seasonal schedules")
+    parser.add_argument("--posted-days", type=int, default=60, help="days ahead that schedules are posted for")
+    parser.add_argument("--filler-kb", type=int, default=200, help="size of the rest of each synthetic page in KB")
+    parser.add_argument("--no-corpus", action="store_true", help="serve only synthetic pages")
+    args = parser.parse_args()
+    corpus = []
+    if not args.no_corpus:
+        _, page_responses, _ = load_corpus()
+        corpus = [(page["url"], response.text) for response, page in page_responses]
+
+    upstream = FakeUpstream(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seasonal_share=args.seasonal_share,
+        posted_days=args.posted_days,
+        filler_kb=args.filler_kb,
+        corpus=corpus,
+    )
+    uvicorn.run(create_app(upstream), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Load test `/api/routeplans` end to end, with schedules downloaded from `fake_upstream.py` instead of BC Ferries.
+
+Starts the fake upstream and the server, each in its own process, with an empty schedule cache and route table
+in a temporary directory.
+Then it sends the same mix of route plan requests twice, first with a cold cache and then with a warm one.
+Popular origin and destination pairs and dates in the next few days are requested more often.
+Each phase reports latency percentiles, throughput and the requests received by the fake upstream.
+Run from the repository root:
+
+    python benchmarks/load_test.py --requests 200 --concurrency 10 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from synthetic import load
+
+from ferry_planner.config import CONFIG
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+
+def make_requests(*, count: int, pairs: int, days: int, seed: int) -> list[dict[str, str]]:
+    """Return route plan options for `count` requests, picked from `pairs` origin and destination pairs.
+
+    Pairs are requested with Zipf-like frequencies and dates with exponentially decreasing frequencies,
+    as most people plan trips for the next few days between a few popular places.
+    """
+    location_db, _ = load()
+    rng = random.Random(seed)
+    locations = sorted(location_db.all(), key=lambda location: location.id)
+    pair_choices = [tuple(rng.sample(locations, 2)) for _ in range(pairs)]
+    weights = [1 / (i + 1) for i in range(pairs)]
+    today = datetime.now(CONFIG.timezone).date()
+    requests = []
+    for _ in range(count):
+        origin, destination = rng.choices(pair_choices, weights)[0]
+        date = today + timedelta(days=min(int(rng.expovariate(1 / 3)), days - 1))
+        requests.append({"origin": origin.id, "destination": destination.id, "date": date.isoformat()})
+    return requests
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, process: subprocess.Popen, /) -> None:
+    while True:
+        if process.poll() is not None:
+            msg = f"process exited with status {process.returncode} before {url} was ready"
+            raise RuntimeError(msg)
+        try:
+            await client.get(url)
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+        else:
+            return
+
+
+async def run_phase(  # noqa: PLR0913
+    client: httpx.AsyncClient,
+    server_url: str,
+    upstream_url: str,
+    requests: list[dict[str, str]],
+    /,
+    *,
+    name: str,
+    concurrency: int,
+) -> None:
+    upstream_before = Counter((await client.get(f"{upstream_url}/stats")).json())
+    latencies = []
+    statuses: Counter[int] = Counter()
+    options = iter(requests)
+
+    async def send_requests() -> None:
+        # The iterator is shared by all workers, so each request is sent by only one of them.
+        for request in options:
+            start = time.perf_counter()
+            response = await client.post(f"{server_url}/api/routeplans", json=request)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send_requests() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    upstream = Counter((await client.get(f"{upstream_url}/stats")).json())
+    upstream.subtract(upstream_before)
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(f"{name} cache: {len(latencies)} requests in {elapsed:.2f} s, {len(latencies) / elapsed:.1f} requests/s")
+    print(f"  latency: p50 {percentiles[49] * 1000:.0f} ms, p99 {percentiles[98] * 1000:.0f} ms")
+    print(f"  statuses: {dict(sorted(statuses.items()))}")
+    print(f"  upstream requests: {dict(sorted((key, value) for key, value in upstream.items() if value))}")
+
+
+async def run(
+    server_url: str,
+    upstream_url: str,
+    processes: list[subprocess.Popen],
+    /,
+    *,
+    args: argparse.Namespace,
+) -> None:
+    requests = make_requests(count=args.requests, pairs=args.pairs, days=args.days, seed=args.seed)
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        await wait_until_ready(client, f"{upstream_url}/stats", processes[0])
+        await wait_until_ready(client, f"{server_url}/api/stats", processes[1])
+        for name in ("cold", "warm"):
+            await run_phase(
+                client,
+                server_url,
+                upstream_url,
+                requests,
+                name=name,
+                concurrency=args.concurrency,
+            )
+        scraper = (await client.get(f"{server_url}/api/stats")).json()["schedules"]["scraper"]
+        print(f"server scraper stats: {scraper}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test route plans with a fake BC Ferries upstream.")
+    parser.add_argument("--requests", type=int, default=200, help="number of requests in each phase")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of requests sent at the same time")
+    parser.add_argument("--pairs", type=int, default=30, help="number of distinct origin and destination pairs")
+    parser.add_argument("--days", type=int, default=14, help="number of days ahead that trips are planned for")
+    parser.add_argument("--seed", type=int, default=0, help="random seed used to pick the requests")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds before a request is abandoned")
+    parser.add_argument("--server-port", type=int, default=8000)
+    parser.add_argument("--upstream-port", type=int, default=8001)
+    # Other arguments are passed to the fake upstream, see `fake_upstream.py --help`.
+    args, upstream_args = parser.parse_known_args()
+
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    server_url = f"http://127.0.0.1:{args.server_port}"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        schedules_config = {
+            "base_url": f"{upstream_url}/routes-fares/schedules/daily/",
+            "cache_dir": cache_dir,
+            "refresh": False,
+        }
+        # The route table is saved on shutdown, in the temporary directory instead of the data directory.
+        data_config = {"route_table_file": str(Path(cache_dir) / "route_table.bin")}
+        env = {
+            **os.environ,
+            "SCHEDULES": json.dumps(schedules_config),
+            "DATA": json.dumps(data_config),
+            "LOG_LEVEL": "logging.WARNING",
+        }
+        upstream_command = [
+            sys.executable,
+            str(BENCHMARKS_DIR / "fake_upstream.py"),
+            "--port",
+            str(args.upstream_port),
+            *upstream_args,
+        ]
+        server_command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "ferry_planner.server:app",
+            "--port",
+            str(args.server_port),
+            "--log-level",
+            "warning",
+        ]
+        processes = [
+            subprocess.Popen(upstream_command),  # noqa: S603
+            subprocess.Popen(server_command, env=env),  # noqa: S603
+        ]
+        try:
+            asyncio.run(run(server_url, upstream_url, processes, args=args))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""Benchmark `ScheduleParser.parse_schedule_html` over a corpus of saved schedule pages and check its results.
+
+The corpus in `benchmarks/corpus` has gzipped pages and `corpus.json`, which lists for each page its URL,
+its expected content hash and the dates it is parsed for, with the expected result of each.
+Any difference from the expected results is reported and makes the benchmark fail,
+so that a faster parser can only be adopted if it gives the same results.
+Run from the repository root:
+
+    python benchmarks/parser_corpus.py --repeat 5
+
+To add a saved page, add its gzipped HTML to the corpus and an entry to `corpus.json`,
+then run with `--update` to record the results of the current parser as expected and review the changes.
+
+Pages marked `"synthetic": true` in `corpus.json` are made by `synthetic.py` with `--generate`,
+which replaces them and keeps the saved pages, as BC Ferries pages cannot be saved in every environment.
+Their expected results were recorded from this parser, so checking them only shows that its results did not
+change, not that it parses real pages correctly. Only saved pages check that, and the corpus has none yet.
+"""
+
+import argparse
+import cProfile
+import gzip
+import json
+import logging
+import pstats
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from synthetic import (
+    make_irregular_schedule_page,
+    make_no_sailings_page,
+    make_schedule,
+    make_schedule_page,
+    make_seasonal_page,
+)
+
+from ferry_planner.config import CONFIG
+from ferry_planner.schedule import (
+    NO_SAILINGS_MESSAGES,
+    HtmlParseResult,
+    SailingTemplate,
+    ScheduleParseError,
+    ScheduleParser,
+)
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+MANIFEST_PATH = CORPUS_DIR / "corpus.json"
+BASE_URL = "https://www.bcferries.com/routes-fares/schedules"
+PHASES = {
+    "extract elements": ("ferry_planner/schedule.py:get_schedule_elements",),
+    "soup build": ("bs4/__init__.py:__init__",),
+    "row extraction": (
+        "ferry_planner/schedule.py:parse_sailing_templates",
+        "ferry_planner/schedule.py:get_seasonal_schedule_weekday_rows",
+    ),
+    "strptime": ("<built-in method strptime>",),
+    "comment rules": (
+        "ferry_planner/schedule.py:parse_sailing_comments",
+        "ferry_planner/schedule.py:is_sailing_excluded_on_date",
+    ),
+}
+"""Functions whose cumulative time makes each phase, see `get_label`.
+Time in `strptime` and comment rules is not counted in row extraction.
+"""
+
+Summary = dict[str, object]
+
+
+def summarize_templates(templates: list[SailingTemplate]) -> list[list[object]]:
+    return [[t.departure.isoformat(), t.arrival.isoformat(), t.duration, list(t.notes)] for t in templates]
+
+
+def summarize(result: HtmlParseResult) -> Summary:
+    seasonal = result.seasonal
+    return {
+        "redirect_url": result.redirect_url,
+        "sailings": [
+            [s.departure.isoformat(), s.arrival.isoformat(), s.duration, list(s.notes)] for s in result.sailings
+        ],
+        "notes": list(result.notes),
+        "seasonal": seasonal
+        and {
+            "start": seasonal.start.isoformat(),
+            "end": seasonal.end.isoformat(),
+            "url": seasonal.url,
+            "no_sailings_message": seasonal.no_sailings_message,
+            "weekdays": [summarize_templates(list(weekday)) for weekday in seasonal.weekdays],
+        },
+    }
+
+
+def parse(schedule_parser: ScheduleParser, response: httpx.Response, date: datetime) -> Summary:
+    try:
+        return summarize(schedule_parser.parse_schedule_html(response, date))
+    except ScheduleParseError as exc:
+        return {"error": str(exc)}
+
+
+def load_corpus() -> tuple[dict, list[tuple[httpx.Response, dict]], list[tuple[httpx.Response, datetime, dict]]]:
+    """Return the manifest, each response with its page, and each response with a date to parse it for and its case."""
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    pages = []
+    cases = []
+    for page in manifest["pages"]:
+        text = gzip.decompress((CORPUS_DIR / page["file"]).read_bytes()).decode()
+        response = httpx.Response(200, text=text, request=httpx.Request("GET", page["url"]))
+        response.read()
+        _ = response.text
+        pages.append((response, page))
+        for case in page["cases"]:
+            date = datetime.fromisoformat(case["date"]).replace(tzinfo=CONFIG.timezone)
+            cases.append((response, date, case))
+    return manifest, pages, cases
+
+
+def save_manifest(manifest: dict) -> None:
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1) + "\n", encoding="utf-8")
+
+
+def generate() -> None:
+    """Replace the synthetic pages of the corpus, keeping the saved pages."""
+    CORPUS_DIR.mkdir(exist_ok=True)
+    start = datetime(2026, 10, 1, tzinfo=CONFIG.timezone)
+    end = datetime(2026, 12, 31, tzinfo=CONFIG.timezone)
+    seasonal_url = f"{BASE_URL}/seasonal/TSA-SWB_{start:%Y%m%d}-{end:%Y%m%d}"
+    daily_page = make_schedule_page(make_schedule("TSA", "SWB", start))
+    # Elements with other attributes ending in "id" set to a schedule element id, which are not schedule elements.
+    # The page has the same schedule elements, and so the same content hash, as the daily page.
+    decoys = (
+        '<div data-id="dailyScheduleTableOnward" class="promo"><p>Sailings updated</p></div>'
+        '<img data-id="dateRangeModal" src="/promo.png" alt="">'
+    )
+    pages = (
+        (
+            "daily.html",
+            f"{BASE_URL}/daily/TSA-SWB?&scheduleDate=10/05/2026",
+            daily_page,
+            (start + timedelta(days=4),),
+        ),
+        (
+            "daily-decoy.html",
+            f"{BASE_URL}/daily/TSA-SWB?&scheduleDate=10/05/2026",
+            daily_page.replace("<main>", f"<main>{decoys}", 1),
+            (start + timedelta(days=4),),
+        ),
+        (
+            "daily-irregular.html",
+            f"{BASE_URL}/daily/HSB-NAN?&scheduleDate=10/03/2026",
+            make_irregular_schedule_page(),
+            tuple(start + timedelta(days=i) for i in (0, 1, 2, 3, 11, 19, 26, 37)),
+        ),
+        (
+            "daily-empty.html",
+            f"{BASE_URL}/daily/PSB-TEX?&scheduleDate=10/05/2026",
+            make_schedule_page(make_schedule("PSB", "TEX", start).model_copy(update={"sailings": ()})),
+            (start + timedelta(days=4),),
+        ),
+        (
+            "seasonal.html",
+            seasonal_url,
+            make_seasonal_page(make_schedule("TSA", "SWB", start), start=start, end=end),
+            (
+                *(start + timedelta(days=i) for i in range(10)),
+                end,
+                # In the next seasonal schedule, which redirects, and before the first one, which is an error.
+                end + timedelta(days=1),
+                start - timedelta(days=1),
+            ),
+        ),
+        *(
+            (
+                f"no-sailings-{i}.html",
+                f"{BASE_URL}/daily/SGI-TSA?&scheduleDate=03/01/2027",
+                make_no_sailings_page(message),
+                (datetime(2027, 3, 1, tzinfo=CONFIG.timezone),),
+            )
+            for i, message in enumerate(NO_SAILINGS_MESSAGES)
+        ),
+    )
+    manifest_pages = []
+    if MANIFEST_PATH.exists():
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+        manifest_pages = [page for page in manifest["pages"] if not page.get("synthetic", False)]
+    for filename, url, text, dates in pages:
+        (CORPUS_DIR / f"{filename}.gz").write_bytes(gzip.compress(text.encode(), mtime=0))
+        manifest_pages.append(
+            {
+                "file": f"{filename}.gz",
+                "url": url,
+                "synthetic": True,
+                "content_hash": None,
+                "cases": [{"date": date.date().isoformat(), "expected": None} for date in dates],
+            },
+        )
+    save_manifest({"pages": manifest_pages})
+
+
+def get_label(function: tuple[str, int, str]) -> str:
+    """Return "package/module.py:function" for a function in a file and its name for a built-in function."""
+    filename, _, name = function
+    if filename == "~":
+        return name
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}:{name}"
+
+
+def profile(schedule_parser: ScheduleParser, cases: list[tuple[httpx.Response, datetime, dict]]) -> dict[str, float]:
+    """Return the seconds spent in each phase of `PHASES`, the rest and the total, per page."""
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    for response, date, _ in cases:
+        parse(schedule_parser, response, date)
+    profiler.disable()
+    total = time.perf_counter() - start
+    stats = pstats.Stats(profiler).stats  # ty: ignore[unresolved-attribute]
+    times = dict.fromkeys(PHASES, 0.0)
+    for function, (_, _, _, cumulative, callers) in stats.items():
+        label = get_label(function)
+        for name, labels in PHASES.items():
+            if label not in labels:
+                continue
+            times[name] += cumulative
+            if name in {"strptime", "comment rules"}:
+                times["row extraction"] -= sum(
+                    caller_stats[3]
+                    for caller, caller_stats in callers.items()
+                    if get_label(caller) in PHASES["row extraction"]
+                )
+    times["other"] = total - sum(times.values())
+    times["total"] = total
+    return {name: value / len(cases) for name, value in times.items()}
+
+
+def measure_memory(schedule_parser: ScheduleParser, cases: list[tuple[httpx.Response, datetime, dict]]) -> int:
+    """Return the most memory allocated at once while parsing a page, in bytes."""
+    tracemalloc.start()
+    peak = 0
+    for response, date, _ in cases:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        parse(schedule_parser, response, date)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return peak
+
+
+def check(
+    schedule_parser: ScheduleParser,
+    page_responses: list[tuple[httpx.Response, dict]],
+    cases: list[tuple[httpx.Response, datetime, dict]],
+    /,
+    *,
+    update: bool,
+) -> int:
+    """Return the number of content hashes and results that differ from the expected ones, or record them."""
+    mismatches = 0
+    for response, page in page_responses:
+        content_hash = schedule_parser.get_content_hash(response.text)
+        if update:
+            page["content_hash"] = content_hash
+        elif content_hash != page["content_hash"]:
+            mismatches += 1
+            print(f"different content hash for {page['file']}")
+    for response, date, case in cases:
+        result = parse(schedule_parser, response, date)
+        if update:
+            case["expected"] = result
+        elif result != case["expected"]:
+            mismatches += 1
+            print(f"different result for {response.url} on {date.date()}")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark and check schedule page parsing over a saved corpus.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of times to parse every page")
+    parser.add_argument("--no-extract-elements", action="store_true", help="parse whole pages")
+    parser.add_argument("--update", action="store_true", help="record the current results as expected")
+    parser.add_argument("--generate", action="store_true", help="replace the corpus with synthetic pages")
+    args = parser.parse_args()
+    # Pages without sailings and unknown sailing comments log warnings.
+    logging.disable(logging.WARNING)
+    if args.generate:
+        generate()
+        args.update = True
+
+    schedule_parser = ScheduleParser(extract_elements=not args.no_extract_elements)
+    manifest, page_responses, cases = load_corpus()
+    mismatches = check(schedule_parser, page_responses, cases, update=args.update)
+    if args.update:
+        save_manifest(manifest)
+        print(f"recorded expected results of {len(cases)} cases")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for response, date, _ in cases:
+            parse(schedule_parser, response, date)
+    elapsed = time.perf_counter() - start
+    pages = len(cases) * args.repeat
+    size = sum(len(response.text) for response, _, _ in cases) / len(cases)
+    synthetic = sum(page.get("synthetic", False) for _, page in page_responses)
+    print(f"{len(cases)} cases, {size / 1024:.0f} KB per page on average")
+    print(f"{len(page_responses) - synthetic} saved pages, {synthetic} synthetic pages checked against themselves")
+    print(f"{pages / elapsed:.1f} pages/s, {elapsed / pages * 1000:.2f} ms per page")
+    print("profiled time per page:")
+    for name, value in profile(schedule_parser, cases).items():
+        print(f"  {name}: {value * 1000:.2f} ms")
+    print(f"peak memory per page: {measure_memory(schedule_parser, cases) / 1024:.0f} KB")
+    print(f"results that differ: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
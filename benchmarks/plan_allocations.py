@@ -0,0 +1,77 @@
+"""Measure the memory allocated by `RoutePlanBuilder` while planning, with `tracemalloc`.
+
+Run from the repository root so that the data files in `config.toml` resolve:
+
+    python benchmarks/plan_allocations.py --pairs 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from synthetic import SyntheticScheduleGetter, load
+
+from ferry_planner.config import CONFIG
+from ferry_planner.options import RoutePlansOptions
+from ferry_planner.route import RouteBuilder, RoutePlanBuilder
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure route plan builder allocations.")
+    parser.add_argument("--pairs", type=int, default=10, help="number of origin/destination pairs to plan")
+    parser.add_argument("--seed", type=int, default=0, help="random seed used to pick the pairs")
+    parser.add_argument("--show-all", action="store_true", help="plan with the show_all option")
+    args = parser.parse_args()
+
+    location_db, connection_db = load()
+    route_builder = RouteBuilder(connection_db)
+    schedule_getter = SyntheticScheduleGetter()
+    builder = RoutePlanBuilder(connection_db=connection_db, schedule_getter=schedule_getter)
+    locations = sorted(location_db.all(), key=lambda location: location.id)
+    pairs = [tuple(random.Random(args.seed + i).sample(locations, 2)) for i in range(args.pairs)]
+    date = datetime(2026, 10, 20, 9, tzinfo=CONFIG.timezone)
+    requests = []
+    for origin, destination in pairs:
+        routes = list(route_builder.find_routes(origin=origin, destination=destination))
+        options = RoutePlansOptions(
+            origin=origin.id,
+            destination=destination.id,
+            date=date,
+            show_all=args.show_all,
+        )
+        requests.append((routes, options))
+        # Fill the schedule cache, so that only planning is measured.
+        await builder.make_route_plans(routes=routes, options=options)
+
+    plans_count = 0
+    peak = 0
+    retained = 0
+    transient = 0
+    elapsed = 0.0
+    for routes, options in requests:
+        tracemalloc.start()
+        start = time.perf_counter()
+        plans = await builder.make_route_plans(routes=routes, options=options)
+        elapsed += time.perf_counter() - start
+        current, request_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Memory still in use is mostly the returned plans, the rest of the peak was only needed while planning.
+        peak = max(peak, request_peak)
+        retained += current
+        transient += request_peak - current
+        plans_count += len(plans)
+        del plans
+
+    mib = 1024 * 1024
+    print(f"pairs: {len(pairs)}, plans: {plans_count}")
+    print(f"time (traced): {elapsed:.3f} s")
+    print(f"largest peak traced memory: {peak / mib:.1f} MiB")
+    print(f"memory of returned plans: {retained / mib:.1f} MiB")
+    print(f"memory only used while planning: {transient / mib:.1f} MiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
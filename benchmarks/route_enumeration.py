@@ -0,0 +1,46 @@
+"""Micro-benchmark for route enumeration with `RouteBuilder.find_routes`.
+
+Run from the repository root so that the data files in `config.toml` resolve:
+
+    python benchmarks/route_enumeration.py --pairs 50
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from ferry_planner.config import CONFIG
+from ferry_planner.data import ConnectionDB, LocationDB
+from ferry_planner.route import RouteBuilder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark route enumeration.")
+    parser.add_argument("--pairs", type=int, default=50, help="number of origin/destination pairs to enumerate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed used to pick the pairs")
+    args = parser.parse_args()
+
+    location_db = LocationDB.from_files(CONFIG.data.location_files)
+    connection_db = ConnectionDB.from_files(CONFIG.data.connection_files, location_db=location_db)
+    route_builder = RouteBuilder(connection_db)
+    locations = sorted(location_db.all(), key=lambda location: location.id)
+    pairs = [tuple(random.Random(args.seed + i).sample(locations, 2)) for i in range(args.pairs)]
+
+    timings = []
+    routes_count = 0
+    for origin, destination in pairs:
+        start = time.perf_counter()
+        routes_count += sum(1 for _ in route_builder.find_routes(origin=origin, destination=destination))
+        timings.append(time.perf_counter() - start)
+
+    print(f"pairs:  {len(pairs)}")
+    print(f"routes: {routes_count}")
+    print(f"total:  {sum(timings):.3f} s")
+    print(f"mean:   {statistics.mean(timings) * 1000:.2f} ms")
+    print(f"median: {statistics.median(timings) * 1000:.2f} ms")
+    print(f"max:    {max(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
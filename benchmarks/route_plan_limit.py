@@ -0,0 +1,117 @@
+"""Check that `RoutePlanBuilder` with `options.limit` returns the fastest plans of the search without a limit.
+
+The limited result must be the same as sorting all plans by duration and keeping the first `limit`,
+with and without `show_all`, whatever order the schedule downloads finish in. Every other sailing
+takes 3 hours longer, so that a later sailing can overtake one pruned by the limit, and downloads take
+a random time, so that routes are planned in a different order on every run. Any difference makes the
+check fail. Run from the repository root:
+
+    python benchmarks/route_plan_limit.py --pairs 60 --limit 3 --runs 3
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+
+from synthetic import SyntheticScheduleGetter, load, make_schedule
+
+from ferry_planner.config import CONFIG
+from ferry_planner.connection import FerryConnection
+from ferry_planner.location import LocationId
+from ferry_planner.options import RoutePlansOptions
+from ferry_planner.route import RouteBuilder, RoutePlan, RoutePlanBuilder, get_fastest_route_plans
+from ferry_planner.schedule import CompactSchedule
+
+SLOW_SAILING_DELAY = timedelta(hours=3)
+"""Time added to the arrival of every other sailing."""
+
+
+class AlternatingScheduleGetter(SyntheticScheduleGetter):
+    """Schedule getter where every other sailing is slow, and each download takes a random time."""
+
+    def __init__(self, *, latency: float, seed: int) -> None:
+        super().__init__()
+        self.max_latency = latency
+        self.random = random.Random(seed)
+
+    async def __call__(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule | None:
+        await asyncio.sleep(self.random.uniform(0, self.max_latency))
+        schedule = make_schedule(origin_id, destination_id, date)
+        sailings = tuple(
+            sailing.model_copy(
+                update={
+                    "arrival": sailing.arrival + (i % 2) * SLOW_SAILING_DELAY,
+                    "duration": sailing.duration + (i % 2) * int(SLOW_SAILING_DELAY.total_seconds()),
+                },
+            )
+            for i, sailing in enumerate(schedule.sailings)
+        )
+        return CompactSchedule.from_schedule(schedule.model_copy(update={"sailings": sailings}))
+
+
+def get_plan_key(plan: RoutePlan, /) -> tuple[int, tuple[tuple[str, tuple[datetime, ...]], ...]]:
+    """Get a key that identifies a plan by its duration, connections and ferry times.
+
+    Times of car segments are left out, since driving plans depart at the current time.
+    """
+    return (
+        plan.duration,
+        tuple(
+            (
+                segment.connection.id,
+                tuple(time for interval in segment.times for time in (interval.start, interval.end))
+                if isinstance(segment.connection, FerryConnection)
+                else (),
+            )
+            for segment in plan.segments
+        ),
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Check route plans with a limit against the search without one.")
+    parser.add_argument("--pairs", type=int, default=60, help="number of origin/destination pairs to plan")
+    parser.add_argument("--limit", type=int, default=3, help="number of fastest plans requested")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs, each with other download times")
+    parser.add_argument("--seed", type=int, default=0, help="random seed used to pick the pairs")
+    parser.add_argument("--latency", type=float, default=0.002, help="maximum seconds to download a schedule")
+    args = parser.parse_args()
+
+    location_db, connection_db = load()
+    route_builder = RouteBuilder(connection_db)
+    locations = sorted(location_db.all(), key=lambda location: location.id)
+    pairs = [tuple(random.Random(args.seed + i).sample(locations, 2)) for i in range(args.pairs)]
+    date = datetime.now(CONFIG.timezone)
+
+    failures = 0
+    for show_all in (False, True):
+        for run in range(args.runs):
+            schedule_getter = AlternatingScheduleGetter(latency=args.latency, seed=args.seed + run)
+            builder = RoutePlanBuilder(connection_db=connection_db, schedule_getter=schedule_getter)
+            differing = []
+            for origin, destination in pairs:
+                routes = list(route_builder.find_routes(origin=origin, destination=destination))
+                options = RoutePlansOptions(origin=origin.id, destination=destination.id, date=date, show_all=show_all)
+                all_plans = await builder.make_route_plans(routes=routes, options=options)
+                limited_options = options.model_copy(update={"limit": args.limit})
+                plans = await builder.make_route_plans(routes=routes, options=limited_options)
+                expected = get_fastest_route_plans(list(all_plans), limit=args.limit)
+                if sorted(map(get_plan_key, plans)) != sorted(map(get_plan_key, expected)):
+                    differing.append(f"{origin.id}-{destination.id}")
+            failures += len(differing)
+            print(f"show_all={show_all} run {run}: {len(differing)} of {len(pairs)} pairs differ {differing}")
+    print(f"results that differ: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
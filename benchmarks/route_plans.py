@@ -0,0 +1,70 @@
+"""Benchmark `RoutePlanBuilder` against `RaptorRoutePlanBuilder` on synthetic schedules.
+
+Run from the repository root so that the data files in `config.toml` resolve:
+
+    python benchmarks/route_plans.py --pairs 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from synthetic import SyntheticScheduleGetter, load
+
+from ferry_planner.config import CONFIG
+from ferry_planner.options import RoutePlansOptions
+from ferry_planner.raptor import RaptorRoutePlanBuilder
+from ferry_planner.route import RouteBuilder, RoutePlanBuilder
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark route plan builders.")
+    parser.add_argument("--pairs", type=int, default=20, help="number of origin/destination pairs to plan")
+    parser.add_argument("--seed", type=int, default=0, help="random seed used to pick the pairs")
+    parser.add_argument("--show-all", action="store_true", help="plan with the show_all option")
+    parser.add_argument("--latency", type=float, default=0, help="simulated seconds to download a schedule")
+    args = parser.parse_args()
+
+    location_db, connection_db = load()
+    route_builder = RouteBuilder(connection_db)
+    schedule_getter = SyntheticScheduleGetter(latency=args.latency)
+    builders = {
+        "routes": RoutePlanBuilder(connection_db=connection_db, schedule_getter=schedule_getter),
+        "raptor": RaptorRoutePlanBuilder(connection_db=connection_db, schedule_getter=schedule_getter),
+    }
+    locations = sorted(location_db.all(), key=lambda location: location.id)
+    pairs = [tuple(random.Random(args.seed + i).sample(locations, 2)) for i in range(args.pairs)]
+    date = datetime.now(CONFIG.timezone)
+
+    timings = dict.fromkeys(builders, 0.0)
+    plans_count = dict.fromkeys(builders, 0)
+    fastest_matches = 0
+    for origin, destination in pairs:
+        routes = list(route_builder.find_routes(origin=origin, destination=destination))
+        options = RoutePlansOptions(
+            origin=origin.id,
+            destination=destination.id,
+            date=date,
+            show_all=args.show_all,
+        )
+        fastest = {}
+        for name, builder in builders.items():
+            # Start every builder with a cold cache when simulating download latency.
+            schedule_getter.clear()
+            start = time.perf_counter()
+            plans = await builder.make_route_plans(routes=routes, options=options)
+            timings[name] += time.perf_counter() - start
+            plans_count[name] += len(plans)
+            fastest[name] = min((plan.duration for plan in plans if len(plan.segments) > 1), default=None)
+        fastest_matches += fastest["raptor"] == fastest["routes"]
+
+    print(f"pairs: {len(pairs)}")
+    for name in builders:
+        print(f"{name}: {timings[name]:.3f} s, {plans_count[name]} plans")
+    print(f"same fastest plan duration: {fastest_matches}/{len(pairs)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
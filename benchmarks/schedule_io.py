@@ -0,0 +1,73 @@
+"""Measure the event loop lag caused by reading stored schedules in `ScheduleDB.get`.
+
+Schedules are read from a temporary JSON store that sleeps for `--disk-latency` seconds
+on every read and write to simulate a slow disk. Run from the repository root:
+
+    python benchmarks/schedule_io.py --schedules 200 --disk-latency 0.005
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from synthetic import make_schedule
+
+from ferry_planner.config import CONFIG
+from ferry_planner.location import LocationId
+from ferry_planner.monitoring import EventLoopLagMonitor
+from ferry_planner.schedule import CompactSchedule, ScheduleDB
+from ferry_planner.schedule_store import JsonScheduleStore
+
+
+class SlowJsonScheduleStore(JsonScheduleStore):
+    def __init__(self, cache_dir: Path, /, *, latency: float) -> None:
+        super().__init__(cache_dir)
+        self.latency = latency
+
+    def get(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> str | None:
+        time.sleep(self.latency)
+        return super().get(origin_id, destination_id, date=date)
+
+    def put(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime, data: str) -> None:
+        time.sleep(self.latency)
+        super().put(origin_id, destination_id, date=date, data=data)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure event loop lag of schedule reads.")
+    parser.add_argument("--schedules", type=int, default=200, help="number of stored schedules to read")
+    parser.add_argument("--disk-latency", type=float, default=0.005, help="simulated seconds per disk access")
+    args = parser.parse_args()
+
+    day = datetime.now(CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+    keys = [(f"O{i % 20}", f"D{i // 20}", day + timedelta(days=i % 7)) for i in range(args.schedules)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = SlowJsonScheduleStore(Path(cache_dir), latency=0)
+        for origin_id, destination_id, date in keys:
+            schedule = make_schedule(origin_id, destination_id, date)
+            store.put(origin_id, destination_id, date=date, data=CompactSchedule.from_schedule(schedule).dump_json())
+        store.latency = args.disk_latency
+        schedule_db = ScheduleDB(ferry_connections=(), cache_dir=Path(cache_dir), store=store)
+
+        monitor = EventLoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        monitor.reset()
+        start = time.perf_counter()
+        schedules = await asyncio.gather(
+            *(schedule_db.get(origin_id, destination_id, date=date) for origin_id, destination_id, date in keys),
+        )
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    lag = monitor.stats()
+    print(f"schedules read: {sum(schedule is not None for schedule in schedules)}, elapsed: {elapsed:.3f} s")
+    print(f"event loop lag: max {lag.max * 1000:.1f} ms, mean {lag.mean * 1000:.1f} ms over {lag.samples} samples")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
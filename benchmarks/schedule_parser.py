@@ -0,0 +1,79 @@
+"""Compare parsing schedule pages with and without extracting the schedule elements first.
+
+Both modes must produce the same `HtmlParseResult` for every page. Run from the repository root:
+
+    python benchmarks/schedule_parser.py --pages 40 --filler-kb 200
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from synthetic import make_schedule, make_schedule_page, make_seasonal_page
+
+from ferry_planner.config import CONFIG
+from ferry_planner.schedule import HtmlParseResult, ScheduleParser
+
+
+def summarize(result: HtmlParseResult) -> tuple:
+    seasonal = result.seasonal
+    return (
+        result.redirect_url,
+        result.sailings,
+        result.notes,
+        seasonal and (seasonal.start, seasonal.end, seasonal.url, seasonal.weekdays, seasonal.no_sailings_message),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare schedule page parsing modes.")
+    parser.add_argument("--pages", type=int, default=40, help="number of pages of each kind")
+    parser.add_argument("--filler-kb", type=int, default=200, help="size of the rest of each page in KB")
+    parser.add_argument("--repeat", type=int, default=3, help="number of times to parse every page")
+    args = parser.parse_args()
+    # Pages without sailings log a warning every time they are parsed.
+    logging.disable(logging.WARNING)
+
+    day = datetime.now(CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = day.replace(day=1)
+    pages = []
+    for i in range(args.pages):
+        schedule = make_schedule(f"O{i}", f"D{i}", day)
+        url = f"https://example.com/routes-fares/schedules/daily/O{i}-D{i}"
+        pages.append((url, make_schedule_page(schedule, filler_kb=args.filler_kb), day))
+        seasonal_page = make_seasonal_page(
+            schedule,
+            start=start,
+            end=start + timedelta(days=60),
+            filler_kb=args.filler_kb,
+        )
+        pages.append((url, seasonal_page, start + timedelta(days=i % 60)))
+    pages.append((url, make_schedule_page(schedule.model_copy(update={"sailings": ()})), day))
+
+    responses = [
+        (httpx.Response(200, text=text, request=httpx.Request("GET", url)), date) for url, text, date in pages
+    ]
+    for response, _ in responses:
+        response.read()
+        _ = response.text
+    size = sum(len(text) for _, text, _ in pages) / len(pages)
+    print(f"{len(pages)} pages, {size / 1024:.0f} KB per page on average")
+
+    results = {}
+    for extract_elements in (False, True):
+        schedule_parser = ScheduleParser(extract_elements=extract_elements)
+        start_time = time.perf_counter()
+        for _ in range(args.repeat):
+            results[extract_elements] = [
+                summarize(schedule_parser.parse_schedule_html(response, date)) for response, date in responses
+            ]
+        elapsed = (time.perf_counter() - start_time) / args.repeat / len(pages)
+        print(f"extract_elements={extract_elements}: {elapsed * 1000:.2f} ms per page")
+    mismatches = sum(a != b for a, b in zip(results[False], results[True], strict=True))
+    print(f"results that differ: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
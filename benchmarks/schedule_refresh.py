@@ -0,0 +1,107 @@
+"""Measure the event loop lag caused by parsing schedule pages during `ScheduleDB.refresh_cache`.
+
+Pages are synthetic and served after `--latency` seconds instead of being downloaded.
+The refresh is run once parsing in the event loop thread and once in `--processes` parser processes.
+Run from the repository root:
+
+    python benchmarks/schedule_refresh.py --days 2 --processes 2
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+from synthetic import load, make_schedule, make_schedule_page
+
+from ferry_planner.config import CONFIG
+from ferry_planner.connection import FerryConnection
+from ferry_planner.monitoring import EventLoopLagMonitor
+from ferry_planner.schedule import ScheduleDB
+from ferry_planner.scraper import ScraperClient
+
+
+class SyntheticScraperClient(ScraperClient):
+    def __init__(self, pages: Mapping[str, str], /, *, latency: float) -> None:
+        super().__init__(CONFIG.schedules.scraper)
+        self.pages = pages
+        """Page of each route, by the last segment of its URL path."""
+        self.latency = latency
+
+    async def get(self, url: str, /, *, headers: Mapping[str, str] | None = None) -> httpx.Response:  # noqa: ARG002
+        await asyncio.sleep(self.latency)
+        request = httpx.Request("GET", url)
+        return httpx.Response(200, text=self.pages[request.url.path.rpartition("/")[2]], request=request)
+
+
+async def refresh(
+    connections: tuple[FerryConnection, ...],
+    client: SyntheticScraperClient,
+    /,
+    *,
+    days: int,
+    processes: int,
+    concurrency: int,
+) -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        schedule_db = ScheduleDB(
+            ferry_connections=connections,
+            cache_dir=Path(cache_dir),
+            client=client,
+            cache_ahead_days=days,
+            parse_processes=processes,
+            refresh_concurrency=concurrency,
+            refresh_jitter=0,
+        )
+        monitor = EventLoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        monitor.reset()
+        start = time.perf_counter()
+        await schedule_db.refresh_cache()
+        elapsed = time.perf_counter() - start
+        await monitor.stop()
+        downloads = schedule_db.stats().downloads
+        await schedule_db.close()
+
+    lag = monitor.stats()
+    print(f"parse_processes={processes}: {downloads} schedules in {elapsed:.2f} s")
+    print(f"  event loop lag: max {lag.max * 1000:.1f} ms, mean {lag.mean * 1000:.1f} ms over {lag.samples} samples")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure event loop lag of schedule parsing during a refresh.")
+    parser.add_argument("--days", type=int, default=2, help="number of days to refresh")
+    parser.add_argument("--processes", type=int, default=2, help="number of parser processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of schedules downloaded at the same time")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per download")
+    parser.add_argument("--filler-kb", type=int, default=200, help="size of the rest of each page in KB")
+    args = parser.parse_args()
+
+    _, connection_db = load()
+    connections = tuple(c for c in connection_db.all() if isinstance(c, FerryConnection))
+    day = datetime.now(CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+    pages = {
+        f"{c.origin.id}-{c.destination.id}": make_schedule_page(
+            make_schedule(c.origin.id, c.destination.id, day),
+            filler_kb=args.filler_kb,
+        )
+        for c in connections
+    }
+    client = SyntheticScraperClient(pages, latency=args.latency)
+    for processes in (0, args.processes):
+        await refresh(
+            connections,
+            client,
+            days=args.days,
+            processes=processes,
+            concurrency=args.concurrency,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
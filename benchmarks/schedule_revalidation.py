@@ -0,0 +1,110 @@
+"""Count the requests made by `ScheduleDB.refresh_cache` to revalidate schedules made from a seasonal page.
+
+Every date of a seasonal page is made from one download, so revalidating them must also take a single
+conditional request per refresh: answered with status 304 while the page is the same, and with the new page
+once it changed, after which every date is made again from it. Any other count makes the check fail.
+Run from the repository root:
+
+    python benchmarks/schedule_revalidation.py --days 14
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import zlib
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from synthetic import load, make_schedule, make_seasonal_page
+
+from ferry_planner.config import CONFIG
+from ferry_planner.connection import FerryConnection
+from ferry_planner.schedule import ScheduleDB
+from ferry_planner.scraper import ScraperClient
+
+
+class SeasonalScraperClient(ScraperClient):
+    def __init__(self, page: str, /) -> None:
+        super().__init__(CONFIG.schedules.scraper)
+        self.page = page
+        """Page served for every URL, with an ETag."""
+        self.requests: list[tuple[str, bool, int]] = []
+        """URL, whether the request was conditional and response status of each request."""
+
+    async def get(self, url: str, /, *, headers: Mapping[str, str] | None = None) -> httpx.Response:
+        request = httpx.Request("GET", url)
+        etag = f'"{zlib.crc32(self.page.encode()):08x}"'
+        if_none_match = (headers or {}).get("If-None-Match")
+        if if_none_match == etag:
+            response = httpx.Response(304, headers={"ETag": etag}, request=request)
+        else:
+            response = httpx.Response(200, text=self.page, headers={"ETag": etag}, request=request)
+        self.requests.append((url, if_none_match is not None, response.status_code))
+        return response
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Count the requests made to revalidate seasonal schedules.")
+    parser.add_argument("--days", type=int, default=14, help="number of days refreshed, all in one seasonal range")
+    args = parser.parse_args()
+
+    _, connection_db = load()
+    connection = next(c for c in connection_db.all() if isinstance(c, FerryConnection))
+    origin_id, destination_id = connection.origin.id, connection.destination.id
+    today = datetime.now(CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today.replace(day=1)
+    end = start + timedelta(days=args.days + 31)
+    schedule = make_schedule(origin_id, destination_id, start)
+    client = SeasonalScraperClient(make_seasonal_page(schedule, start=start, end=end))
+    changed_sailings = make_schedule(destination_id, origin_id, start).sailings
+    changed_page = make_seasonal_page(schedule.model_copy(update={"sailings": changed_sailings}), start=start, end=end)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        schedule_db = ScheduleDB(
+            ferry_connections=(connection,),
+            cache_dir=Path(cache_dir),
+            client=client,
+            cache_ahead_days=args.days,
+            parse_processes=0,
+            refresh_concurrency=1,
+            refresh_jitter=0,
+            refresh_revalidate=True,
+        )
+        # Downloads the schedules, then revalidates them while the page is the same, after it changed, and again.
+        for name, page, expected_status in (
+            ("download", client.page, None),
+            ("unchanged page", client.page, 304),
+            ("changed page", changed_page, 200),
+            ("unchanged again", changed_page, 304),
+        ):
+            client.page = page
+            client.requests.clear()
+            stats = schedule_db.stats()
+            await schedule_db.refresh_cache()
+            unchanged = schedule_db.stats().unchanged_revalidations - stats.unchanged_revalidations
+            statuses = [status for _, _, status in client.requests]
+            conditional = sum(is_conditional for _, is_conditional, _ in client.requests)
+            print(f"{name}: {len(client.requests)} requests, {conditional} conditional, statuses {statuses}")
+            print(f"  unchanged schedules: {unchanged} of {args.days}")
+            ok = len(client.requests) == 1
+            if expected_status is not None:
+                ok = ok and conditional == 1 and statuses == [expected_status]
+                ok = ok and unchanged == (args.days if expected_status == 304 else 0)  # noqa: PLR2004
+            if not ok:
+                failures += 1
+                print("  unexpected requests")
+            last = await schedule_db.get(origin_id, destination_id, date=today + timedelta(days=args.days - 1))
+            if last is None or last.source is None:
+                failures += 1
+                print("  schedule of the last date has no source")
+        await schedule_db.close()
+    print(f"checks that failed: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
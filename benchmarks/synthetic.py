@@ -0,0 +1,177 @@
+"""Synthetic data for benchmarks, which otherwise would download schedules from BC Ferries."""
+
+import asyncio
+import html
+import zlib
+from datetime import datetime, timedelta
+
+from ferry_planner.config import CONFIG
+from ferry_planner.data import ConnectionDB, LocationDB
+from ferry_planner.location import LocationId
+from ferry_planner.schedule import CompactSchedule, FerrySailing, FerrySchedule
+from ferry_planner.snapshot import load_databases
+
+
+def load() -> tuple[LocationDB, ConnectionDB]:
+    return load_databases(CONFIG.data)
+
+
+def make_schedule(origin_id: LocationId, destination_id: LocationId, date: datetime) -> FerrySchedule:
+    """Make a deterministic schedule with sailings from early morning until late evening."""
+    seed = zlib.crc32(f"{origin_id}-{destination_id}".encode())
+    duration = timedelta(minutes=20 + seed % 100)
+    interval = timedelta(minutes=60 + (seed >> 8) % 120)
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    departure = day + timedelta(hours=5, minutes=(seed >> 16) % 180)
+    sailings = []
+    while departure.hour < 22 and departure.day == day.day:  # noqa: PLR2004
+        arrival = departure + duration
+        sailings.append(
+            FerrySailing(
+                departure=departure,
+                arrival=arrival,
+                duration=int(duration.total_seconds()),
+            ),
+        )
+        departure += interval
+    return FerrySchedule(
+        date=day,
+        origin=origin_id,
+        destination=destination_id,
+        sailings=tuple(sailings),
+        url=f"https://example.com/{origin_id}-{destination_id}",
+    )
+
+
+def _make_page(content: str, *, filler_kb: int) -> str:
+    """Wrap schedule elements in a page with navigation, scripts and footer like the real pages."""
+    nav = "".join(f'<li class="nav-item"><a href="/routes-fares/{i}">Link {i}</a></li>' for i in range(40))
+    script = "<script>window.dataLayer = window.dataLayer || []; var config = {};</script>"
+    block = f'<div class="section"><p>Plan your trip &amp; travel with us.</p><ul>{nav}</ul>{script}</div>'
+    count = max(2, filler_kb * 1024 // len(block))
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Schedules</title>'
+        f"{script}</head><body><header>{block * (count // 2)}</header><main>{content}</main>"
+        f"<footer>{block * (count - count // 2)}</footer></body></html>"
+    )
+
+
+def _make_row(departure: str, arrival: str, duration: str, notes: tuple[str, ...] = ()) -> str:
+    comments = "".join(f"\n<p>Note: {html.escape(note)}</p>" for note in notes)
+    return (
+        '<tr class="schedule-table-row"><td class="icon"><img alt="" src="/ferry.svg"></td>'
+        f"<td>\n{departure}{comments}\n</td><td>{arrival}</td><td>{duration}</td></tr>"
+    )
+
+
+def _format_time(dt: datetime) -> str:
+    return dt.strftime("%I:%M %p")
+
+
+def _format_duration(seconds: int) -> str:
+    hours, minutes = divmod(seconds // 60, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+
+def make_schedule_page(schedule: FerrySchedule, *, filler_kb: int = 200) -> str:
+    """Make a daily schedule page like the ones on the BC Ferries website, with the sailings of `schedule`."""
+    rows = "".join(
+        _make_row(_format_time(s.departure), _format_time(s.arrival), _format_duration(s.duration), s.notes)
+        for s in schedule.sailings
+    )
+    table = (
+        '<table id="dailyScheduleTableOnward" class="table"><thead><tr><th>Depart</th></tr></thead>'
+        f"<tbody>{rows}</tbody></table>"
+    )
+    return _make_page(table, filler_kb=filler_kb)
+
+
+def make_seasonal_page(
+    schedule: FerrySchedule,
+    *,
+    start: datetime,
+    end: datetime,
+    filler_kb: int = 200,
+) -> str:
+    """Make a seasonal schedule page for the range from `start` to `end` with the sailings of `schedule` every day.
+
+    Some sailings only run on some dates or not on others, as described by notes.
+    """
+    ranges = (start, end), (end + timedelta(days=1), end + timedelta(days=90))
+    links = "".join(
+        f'<a href="/routes-fares/schedules/seasonal/{schedule.origin}-{schedule.destination}_'
+        f'{a.strftime("%Y%m%d")}-{b.strftime("%Y%m%d")}">{a.date()} - {b.date()}</a>'
+        for a, b in ranges
+    )
+    month = start.strftime("%b")
+    body = ""
+    for weekday in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"):
+        body += f"<thead><tr><th>{weekday}</th></tr></thead>"
+        for i, sailing in enumerate(schedule.sailings):
+            notes = sailing.notes
+            if i % 4 == 1:
+                notes = (f"Except on {month} {start.day + 1} & {start.day + 8}",)
+            elif i % 4 == 3:  # noqa: PLR2004
+                notes = (f"Only on {month} {start.day + 2}, {start.day + 9}",)
+            departure, arrival = _format_time(sailing.departure), _format_time(sailing.arrival)
+            body += _make_row(departure, arrival, _format_duration(sailing.duration), notes)
+    content = (
+        f'<div id="dateRangeModal" class="modal"><div class="modal-body">{links}</div></div>'
+        f'<form id="seasonalSchedulesForm"><table class="table">{body}</table></form>'
+    )
+    return _make_page(content, filler_kb=filler_kb)
+
+
+def make_irregular_schedule_page(*, filler_kb: int = 200) -> str:
+    """Make a daily schedule page for October with the irregular rows, notes and formats found on real pages."""
+    rows = (
+        _make_row("6:15 AM", "7:50 AM", "1h 35m"),
+        _make_row("8:30 AM", "10:05 AM", "1h 35m", ("Only on Oct 3, 10 & Nov 7",)),
+        _make_row("10:45 AM", "12:20 PM", "1:35", ("Except on Oct 12",)),
+        _make_row("1:\u206000 PM", "2:\u206035 PM", "1h 35m", ("Reservations recommended",)),
+        _make_row("3:00 PM", "3:45 PM", "45m", ("FOOT PASSENGERS ONLY",)),
+        _make_row("5:00 PM", "7:00 PM", "2h", ("Not available on Oct 20, 27 & Nov 3",)),
+        _make_row("No sailings available", "", ""),
+        '<tr class="schedule-table-row"><td colspan="2">Sailings depart from berth 2</td></tr>',
+        _make_row("7:30 PM", "9:05 PM", "1h 35m", ("Only on 01 OCT, 02 OCT, 05 NOV", "Except on Oct 2")),
+        _make_row("11:50 PM", "1:25 AM", "1h 35m", ("Except Oct 3, 4 & Dec 25",)),
+    )
+    table = (
+        '<table id="dailyScheduleTableOnward" class="table"><thead><tr><th>Depart</th></tr></thead>'
+        f"<tbody>{''.join(rows)}</tbody></table>"
+    )
+    return _make_page(table, filler_kb=filler_kb)
+
+
+def make_no_sailings_page(message: str, *, filler_kb: int = 200) -> str:
+    """Make a schedule page without a schedule, showing `message` instead."""
+    return _make_page(f'<div class="alert">{html.escape(message)}</div>', filler_kb=filler_kb)
+
+
+class SyntheticScheduleGetter:
+    """Schedule getter that makes synthetic schedules, optionally with a delay on the first request."""
+
+    def __init__(self, *, latency: float = 0) -> None:
+        self.latency = latency
+        self.requests = 0
+        self._schedules: dict[tuple[LocationId, LocationId, datetime], CompactSchedule] = {}
+
+    def clear(self) -> None:
+        self._schedules.clear()
+
+    async def __call__(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule | None:
+        self.requests += 1
+        day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        key = (origin_id, destination_id, day)
+        if key not in self._schedules:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self._schedules[key] = CompactSchedule.from_schedule(make_schedule(origin_id, destination_id, day))
+        return self._schedules[key]
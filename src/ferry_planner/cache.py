@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+KeyT = TypeVar("KeyT", bound="Hashable")
+ValueT = TypeVar("ValueT")
+
+
+class CacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    """Entries removed to keep the cache within `max_size`."""
+    expirations: int
+    """Entries removed because they were older than the cache TTL."""
+
+
+class LRUCache(Generic[KeyT, ValueT]):
+    """Least recently used cache with a maximum size and a time to live for entries.
+
+    Entries expire `ttl` seconds after they are added, each on its own,
+    so reloading expired entries is spread over time instead of happening all at once.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[KeyT, tuple[ValueT, float]] = OrderedDict()
+        """Values and the time they expire at, least recently used first."""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: KeyT, /) -> ValueT | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: KeyT, value: ValueT, /, *, ttl: float | None = None) -> None:
+        """Add or replace an entry, which expires after `ttl` seconds instead of the cache TTL if given."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = float("inf") if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: KeyT, /) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+        )
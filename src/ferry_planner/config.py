@@ -14,6 +14,7 @@ from pydantic_settings import (
 
 from ferry_planner.connection import AirConnection, BusConnection, CarConnection, Connection, FerryConnection
 from ferry_planner.location import Airport, BusStop, City, Location, Terminal
+from ferry_planner.schedule_store import ScheduleStoreType
 
 
 def check_is_file(path: Path, /) -> Path:
@@ -74,13 +75,87 @@ class DataFileInfo(BaseModel, Generic[DataFileT]):
 class DataConfig(BaseModel):
     location_files: tuple[DataFileInfo[Location], ...]
     connection_files: tuple[DataFileInfo[Connection], ...]
+    snapshot_file: Path = Path("./data/snapshot.bin")
+    """Binary snapshot compiled from the data files, see `ferry_planner.snapshot`."""
+    geometry_file: Path = Path("./data/geometry.bin")
+    """Connection polylines compiled from the data files, see `ferry_planner.geometry`."""
+    route_table_file: Path = Path("./data/route_table.bin")
+    """Routes between origin/destination pairs computed from the data files, see `ferry_planner.route_table`."""
+    route_table_max_pairs: int = 4096
+    """Maximum number of origin/destination pairs kept in memory by each process and saved in the route table."""
+    route_table_save_interval_seconds: int = 10 * 60
+
+
+class UnavailableSchedulesConfig(BaseModel):
+    """Caching of schedules that could not be downloaded or have not been posted yet.
+
+    They are not stored on disk, and are downloaded again after a time to live that depends on the reason.
+    """
+
+    cache_size: int = 4096
+    """Maximum number of unavailable schedules kept in memory."""
+    download_error_ttl_seconds: int = 5 * 60
+    """The request failed or the server returned an error status."""
+    parse_error_ttl_seconds: int = 60 * 60
+    """The page was downloaded but could not be parsed."""
+    not_posted_ttl_seconds: int = 6 * 60 * 60
+    """The page says that the schedule has not been posted yet or is currently unavailable."""
+
+
+class ScraperConfig(BaseModel):
+    """Requests to the schedule pages, see `ferry_planner.scraper`."""
+
+    timeout_seconds: float = 30.0
+    rate_limit: float = 5.0
+    """Average number of requests per second."""
+    rate_limit_burst: int = 10
+    """Number of requests that can be sent at once after being idle."""
+    max_retries: int = 3
+    """Retries of requests that fail with a connection error, a timeout, or status 429 or 5xx."""
+    backoff_base_seconds: float = 0.5
+    """Maximum delay before the first retry, doubled for each following retry."""
+    backoff_max_seconds: float = 30.0
+    min_concurrency: int = 1
+    max_concurrency: int = 5
+    """Maximum number of concurrent requests, the limit starts here and decreases on slow responses and errors."""
+    target_latency_seconds: float = 5.0
+    """Responses slower than this decrease the concurrency limit."""
+    concurrency_decrease_factor: float = 0.5
 
 
 class SchedulesConfig(BaseModel):
     base_url: str = "https://www.bcferries.com/routes-fares/schedules/daily/"
     cache_dir: DirectoryPath = Path("./data/schedule_cache")
+    store: ScheduleStoreType = "json"
+    """Storage of downloaded schedules in `cache_dir`, one JSON file per route per day
+    or a single SQLite database (see `ferry_planner.schedule_store`).
+    """
     cache_ahead_days: int = 1
     refresh_interval_seconds: int = 24 * 60 * 60  # 24 hours
+    refresh: bool = True
+    """Download missing schedules for the next `cache_ahead_days` days in the background."""
+    refresh_concurrency: int = 2
+    """Maximum number of schedules downloaded at the same time by the background refresh."""
+    refresh_jitter_seconds: float = 1.0
+    """Maximum random delay before each background download, to spread the requests over time."""
+    refresh_revalidate: bool = False
+    """Also download stored schedules again in the background refresh, with conditional requests,
+    and save them if their page changed.
+    Every server process runs its own refresh, so with several workers each stored schedule is requested
+    once per worker in every refresh.
+    """
+    mem_cache_size: int = 2048
+    """Maximum number of schedules kept in memory."""
+    mem_cache_ttl_seconds: int = 60 * 60
+    """Seconds that a schedule is kept in memory before it is read from disk again."""
+    io_threads: int = 4
+    """Number of threads used to read and write stored schedules."""
+    parse_processes: int = 2
+    """Number of processes used to parse downloaded schedule pages, so that parsing does not block the event loop.
+    0 parses them in the event loop thread.
+    """
+    unavailable: UnavailableSchedulesConfig = UnavailableSchedulesConfig()
+    scraper: ScraperConfig = ScraperConfig()
 
 
 class Config(BaseSettings):
@@ -7,7 +7,7 @@ if TYPE_CHECKING:
     from collections.abc import Iterable, Iterator, MutableMapping, Sequence
 
     from ferry_planner.config import DataFileInfo, DataFileT
-    from ferry_planner.connection import Connection, ConnectionId
+    from ferry_planner.connection import Connection, ConnectionId, ConnectionType
     from ferry_planner.location import Location, LocationId
 
 LocationT = TypeVar("LocationT", bound="Location")
@@ -65,6 +65,18 @@ class LocationDB:
 class ConnectionDB:
     def __init__(self, connections: Iterable[Connection], /) -> None:
         self._connections = {connection.id: connection for connection in connections}
+        # Adjacency indexes, so that lookups by location do not scan every connection.
+        # Buckets are keyed by `(location_id, None)` for all connections and by
+        # `(location_id, connection_type)` for connections of a single type.
+        self._from_index: dict[tuple[LocationId, ConnectionType | None], list[Connection]] = {}
+        self._to_index: dict[tuple[LocationId, ConnectionType | None], list[Connection]] = {}
+        for connection in self._connections.values():
+            for index, location_id in (
+                (self._from_index, connection.origin.id),
+                (self._to_index, connection.destination.id),
+            ):
+                index.setdefault((location_id, None), []).append(connection)
+                index.setdefault((location_id, connection.type), []).append(connection)
 
     @classmethod
     def from_files(cls, data_files: Sequence[DataFileInfo[Connection]], /, *, location_db: LocationDB) -> ConnectionDB:
@@ -86,13 +98,25 @@ class ConnectionDB:
         """Get a connection by its ID."""
         return self._connections[connection_id]
 
-    def from_location(self, location: OriginT, /) -> Iterator[Connection[OriginT, Location]]:
-        """Get all connections from a location."""
-        return (connection for connection in self._connections.values() if connection.origin.id == location.id)
+    def from_location(
+        self,
+        location: OriginT,
+        /,
+        *,
+        type: ConnectionType | None = None,
+    ) -> Iterator[Connection[OriginT, Location]]:
+        """Get all connections from a location, optionally only of the given type."""
+        return iter(self._from_index.get((location.id, type), ()))
 
-    def to_location(self, location: DestinationT, /) -> Iterator[Connection[Location, DestinationT]]:
-        """Get all connections to a location."""
-        return (connection for connection in self._connections.values() if connection.destination.id == location.id)
+    def to_location(
+        self,
+        location: DestinationT,
+        /,
+        *,
+        type: ConnectionType | None = None,
+    ) -> Iterator[Connection[Location, DestinationT]]:
+        """Get all connections to a location, optionally only of the given type."""
+        return iter(self._to_index.get((location.id, type), ()))
 
     def from_to_location(self, origin: OriginT, destination: DestinationT, /) -> Connection[OriginT, DestinationT]:
         """Get a connection between two locations."""
@@ -106,24 +130,29 @@ class ConnectionDB:
         self,
         location: LocationT,
         /,
+        *,
+        type: ConnectionType | None = None,
     ) -> Iterator[Connection[Location, LocationT] | Connection[LocationT, Location]]:
         """Get all connections that include a location as either the origin or destination."""
-        return (
-            connection
-            for connection in self._connections.values()
-            if location.id in {connection.origin.id, connection.destination.id}
-        )
+        yield from self.from_location(location, type=type)
+        # A connection from a location to itself would already have been yielded above.
+        for connection in self.to_location(location, type=type):
+            if connection.origin.id != location.id:
+                yield connection
 
     def with_locations(
         self,
         origin: OriginT,
         destination: DestinationT,
         /,
+        *,
+        type: ConnectionType | None = None,
     ) -> Iterator[Connection[OriginT, DestinationT] | Connection[DestinationT, OriginT]]:
         """Get connections that include two locations as either the origin or destination."""
+        location_ids = dict.fromkeys((origin.id, destination.id))
         return (
             connection
-            for connection in self._connections.values()
-            if origin.id in {connection.origin.id, connection.destination.id}
-            and destination.id in {connection.origin.id, connection.destination.id}
+            for location_id in location_ids
+            for connection in self._from_index.get((location_id, type), ())
+            if connection.destination.id in location_ids
         )
@@ -0,0 +1,176 @@
+"""Memory-mapped store of connection polylines.
+
+The `coordinates` of ferry connections are only needed to draw maps, so they are not part of the
+connection models. They are compiled into a separate binary file together with the data snapshot
+(see `ferry_planner.snapshot`), simplified with the Ramer-Douglas-Peucker algorithm,
+and read from a memory map only when a polyline is requested.
+
+File layout: header (magic, version, source hash), index length (4 bytes, big endian),
+JSON index of `{connection_id: [offset, points_count, etag]}`, followed by
+little endian float64 `latitude, longitude` pairs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+# Pydantic uses the type hints at runtime for validation.
+from ferry_planner.connection import ConnectionId  # noqa: TC001
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from ferry_planner.config import DataConfig
+
+GEOMETRY_MAGIC = b"FPGEOM"
+GEOMETRY_VERSION = 1
+"""Increment when the geometry file format or the simplification changes."""
+SIMPLIFY_TOLERANCE = 0.0001
+"""Maximum distance in degrees (approximately 10 metres) that a simplified polyline may deviate from the original."""
+
+Point = tuple[float, float]
+"""Latitude and longitude in degrees."""
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionGeometry(BaseModel):
+    id: ConnectionId
+    coordinates: tuple[Point, ...]
+    """Simplified polyline of `(latitude, longitude)` points."""
+    etag: str
+
+
+def _get_header(source_hash: str, /) -> bytes:
+    return GEOMETRY_MAGIC + GEOMETRY_VERSION.to_bytes(2, "big") + bytes.fromhex(source_hash)
+
+
+def _point_line_distance(point: Point, start: Point, end: Point, /) -> float:
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return ((x - x1) ** 2 + (y - y1) ** 2) ** 0.5
+    return abs(dy * x - dx * y + x2 * y1 - y2 * x1) / (dx**2 + dy**2) ** 0.5
+
+
+def simplify_polyline(points: Sequence[Point], /, *, tolerance: float = SIMPLIFY_TOLERANCE) -> list[Point]:
+    """Simplify a polyline with the Ramer-Douglas-Peucker algorithm."""
+    if len(points) < 3:  # noqa: PLR2004
+        return list(points)
+    keep = bytearray(len(points))
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance = 0.0
+        max_index = first
+        for i in range(first + 1, last):
+            distance = _point_line_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance = distance
+                max_index = i
+        if max_distance > tolerance:
+            keep[max_index] = True
+            stack.extend(((first, max_index), (max_index, last)))
+    return [point for point, kept in zip(points, keep, strict=True) if kept]
+
+
+def _parse_coordinates(coordinates: Sequence[str], /) -> list[Point]:
+    # Coordinates are stored as `"{latitude},{longitude},{altitude}"` strings.
+    points = []
+    for coordinate in coordinates:
+        latitude, longitude, *_ = coordinate.split(",")
+        points.append((float(latitude), float(longitude)))
+    return points
+
+
+def build_geometry_store(data_config: DataConfig, /, *, source_hash: str) -> None:
+    """Compile the `coordinates` of the connection data files into `data_config.geometry_file`."""
+    index: dict[ConnectionId, tuple[int, int, str]] = {}
+    values = array("d")
+    for data_file in data_config.connection_files:
+        data = json.loads(data_file.path.read_text(encoding="utf-8"))
+        for connection_id, obj in data.items():
+            if not obj.get("coordinates"):
+                continue
+            points = simplify_polyline(_parse_coordinates(obj["coordinates"]))
+            offset = len(values)
+            for point in points:
+                values.extend(point)
+            etag = hashlib.sha256(values[offset:].tobytes()).hexdigest()[:32]
+            index[connection_id] = (offset * values.itemsize, len(points), etag)
+    if sys.byteorder == "big":
+        values.byteswap()
+    index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    path = data_config.geometry_file
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(
+        _get_header(source_hash) + len(index_bytes).to_bytes(4, "big") + index_bytes + values.tobytes(),
+    )
+    tmp_path.replace(path)
+    logger.info("wrote geometry of %d connections to '%s'", len(index), path)
+
+
+class GeometryStore:
+    """Read-only access to a geometry file, opened lazily on first use."""
+
+    def __init__(self, path: Path, /, *, source_hash: str) -> None:
+        self.path = path
+        self._source_hash = source_hash
+        self._mmap: mmap.mmap | None = None
+        self._index: dict[ConnectionId, tuple[int, int, str]] | None = None
+        self._data_offset = 0
+
+    def _open(self) -> dict[ConnectionId, tuple[int, int, str]]:
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        try:
+            with self.path.open("rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            logger.warning("geometry file '%s' is missing or empty", self.path)
+            return self._index
+        header = _get_header(self._source_hash)
+        if self._mmap[: len(header)] != header:
+            logger.warning("geometry file '%s' is stale, run 'python -m ferry_planner.snapshot'", self.path)
+            return self._index
+        index_length = int.from_bytes(self._mmap[len(header) : len(header) + 4], "big")
+        index_start = len(header) + 4
+        self._index = {
+            connection_id: (offset, count, etag)
+            for connection_id, (offset, count, etag) in json.loads(
+                self._mmap[index_start : index_start + index_length],
+            ).items()
+        }
+        self._data_offset = index_start + index_length
+        return self._index
+
+    def get(self, connection_id: ConnectionId, /) -> ConnectionGeometry | None:
+        entry = self._open().get(connection_id)
+        if entry is None or self._mmap is None:
+            return None
+        offset, count, etag = entry
+        start = self._data_offset + offset
+        values = struct.unpack_from(f"<{count * 2}d", self._mmap, start)
+        return ConnectionGeometry(
+            id=connection_id,
+            coordinates=tuple(zip(values[::2], values[1::2], strict=True)),
+            etag=etag,
+        )
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = None
+        self._index = None
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING
+
+from ferry_planner.connection import ConnectionType
+from ferry_planner.location import City
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from ferry_planner.connection import Connection, ConnectionId
+    from ferry_planner.data import ConnectionDB
+    from ferry_planner.location import Location, LocationId
+
+CONNECTION_TYPE_CODES = {connection_type: code for code, connection_type in enumerate(ConnectionType)}
+NO_LAND_GROUP = -1
+
+
+class ConnectionGraph:
+    """Compact, array-backed form of a `ConnectionDB` used for route search.
+
+    Location IDs are interned to dense integers and connections are stored as edges in
+    compressed sparse row (CSR) arrays: the edges from location `i` are at indexes
+    `offsets[i]` to `offsets[i + 1]` of the edge arrays, in the order of `ConnectionDB.from_location`.
+    """
+
+    def __init__(self, connections: Sequence[Connection[Location, Location]], /) -> None:
+        self.locations: list[Location] = []
+        """Locations by index."""
+        self.location_indexes: dict[LocationId, int] = {}
+        """Location indexes by location ID."""
+        land_group_codes: dict[str, int] = {}
+        for connection in connections:
+            for location in (connection.origin, connection.destination):
+                if location.id not in self.location_indexes:
+                    self.location_indexes[location.id] = len(self.locations)
+                    self.locations.append(location)
+        self.land_groups = array(
+            "l",
+            (
+                land_group_codes.setdefault(location.land_group, len(land_group_codes))
+                if location.land_group
+                else NO_LAND_GROUP
+                for location in self.locations
+            ),
+        )
+        """Land group code by location index, or `NO_LAND_GROUP`."""
+        self.land_groups_count = len(land_group_codes)
+        self.is_city = bytearray(isinstance(location, City) for location in self.locations)
+        """Whether the location at each index is a city."""
+
+        # Stable sort keeps the order of connections from each location.
+        edges = sorted(connections, key=lambda connection: self.location_indexes[connection.origin.id])
+        self.offsets = array("l", [0] * (len(self.locations) + 1))
+        for connection in edges:
+            self.offsets[self.location_indexes[connection.origin.id] + 1] += 1
+        for i in range(len(self.locations)):
+            self.offsets[i + 1] += self.offsets[i]
+        self.targets = array("l", (self.location_indexes[connection.destination.id] for connection in edges))
+        self.durations = array("l", (connection.duration for connection in edges))
+        """Duration in seconds by edge index."""
+        self.distances = array("d", (connection.distance for connection in edges))
+        """Distance in kilometers by edge index."""
+        self.types = array("b", (CONNECTION_TYPE_CODES[connection.type] for connection in edges))
+        """Connection type code by edge index, see `CONNECTION_TYPE_CODES`."""
+        self.connection_ids: list[ConnectionId] = [connection.id for connection in edges]
+        """Connection ID by edge index."""
+        self.edge_indexes: dict[int, int] = {
+            self.pair_key(self.location_indexes[connection.origin.id], self.targets[i]): i
+            for i, connection in enumerate(edges)
+        }
+        """Edge indexes keyed by `pair_key(origin_index, destination_index)`."""
+
+    @classmethod
+    def from_connection_db(cls, connection_db: ConnectionDB, /) -> ConnectionGraph:
+        return cls(tuple(connection_db.all()))
+
+    def pair_key(self, origin_index: int, destination_index: int, /) -> int:
+        return origin_index * len(self.locations) + destination_index
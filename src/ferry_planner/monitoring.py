@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+from pydantic import BaseModel
+
+
+class EventLoopLagStats(BaseModel):
+    """Event loop lag in seconds, the time callbacks wait to run after they are due."""
+
+    current: float
+    mean: float
+    max: float
+    samples: int
+
+
+class EventLoopLagMonitor:
+    """Measure how late a task that sleeps for `interval` seconds wakes up on the running event loop.
+
+    Anything that blocks the event loop, such as synchronous disk I/O, delays every other request by the same time.
+    """
+
+    def __init__(self, *, interval: float = 0.25) -> None:
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+        self._current = 0.0
+        self._total = 0.0
+        self._max = 0.0
+        self._samples = 0
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.add_sample(max(0.0, loop.time() - start - self.interval))
+
+    def add_sample(self, lag: float, /) -> None:
+        self._current = lag
+        self._total += lag
+        self._max = max(self._max, lag)
+        self._samples += 1
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def reset(self) -> None:
+        self._current = self._total = self._max = 0.0
+        self._samples = 0
+
+    def stats(self) -> EventLoopLagStats:
+        return EventLoopLagStats(
+            current=self._current,
+            mean=self._total / self._samples if self._samples else 0.0,
+            max=self._max,
+            samples=self._samples,
+        )
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Self
+from typing import Literal, Self
 
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, PositiveInt, field_validator, model_validator
 
 from ferry_planner.config import CONFIG
 from ferry_planner.location import LocationId
@@ -39,3 +39,9 @@ class RoutePlansOptions(ScheduleOptions):
     hostled: bool = False
     buffer: int = 15
     """Buffer time in minutes."""
+    planner: Literal["routes", "raptor"] = "routes"
+    """Planning engine, `"routes"` plans each route separately and `"raptor"` searches all routes at once,
+    returning only Pareto-optimal plans (see `ferry_planner.raptor`).
+    """
+    limit: PositiveInt | None = None
+    """Maximum number of plans to return, the fastest ones. All plans are returned if not set."""
@@ -0,0 +1,286 @@
+"""Round-based (RAPTOR-style) route planning over the sailings of a day.
+
+Unlike `RoutePlanBuilder`, which walks the sailings of every route separately,
+`RaptorRoutePlanBuilder` searches all routes at once. Round `k` finds the plans that take `k` ferries:
+every location reached in the previous round boards the ferries that leave it,
+and every location reached by ferry may then be left by one car connection,
+the same as routes found by `RouteBuilder`, which never have two car connections in a row.
+
+Each location keeps a bag of Pareto-optimal labels with the criteria departure time (later is better),
+arrival time, number of ferries and driving time (lower is better),
+so prefixes shared between routes are only evaluated once and dominated partial plans are dropped early.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ferry_planner.connection import CarConnection, FerryConnection
+from ferry_planner.route import (
+    DRIVING_DURATION_LIMIT,
+    SECONDS_PER_DAY,
+    RoutePlan,
+    SegmentRecord,
+    get_check_in_deadline,
+    get_fastest_route_plans,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable, Sequence
+    from datetime import datetime
+
+    from ferry_planner.connection import Connection
+    from ferry_planner.data import ConnectionDB
+    from ferry_planner.location import Location, LocationId
+    from ferry_planner.options import RoutePlansOptions
+    from ferry_planner.route import Route, Sailings
+    from ferry_planner.schedule import ScheduleGetter
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Label:
+    """Partial plan, with times in seconds since the midnight of the plan day (see `SegmentRecord`)."""
+
+    arrival: int
+    driving: int
+    """Driving duration in seconds."""
+    ferries: int
+    depart: int | None
+    """Departure time of the plan, or `None` before the first ferry is boarded, when any departure is possible."""
+    parent: Label | None = None
+    leg: SegmentRecord | None = None
+
+    def dominates(self, other: Label, /) -> bool:
+        return (
+            self.arrival <= other.arrival
+            and self.driving <= other.driving
+            and self.ferries <= other.ferries
+            and (self.depart is None or (other.depart is not None and self.depart >= other.depart))
+        )
+
+
+def _add_label(bag: list[Label], label: Label, /) -> bool:
+    """Add a label to a Pareto bag unless it is dominated, removing labels it dominates."""
+    if any(existing.dominates(label) for existing in bag):
+        return False
+    bag[:] = [existing for existing in bag if not label.dominates(existing)]
+    bag.append(label)
+    return True
+
+
+class RaptorRoutePlanBuilder:
+    def __init__(self, *, connection_db: ConnectionDB, schedule_getter: ScheduleGetter) -> None:
+        self._connection_db = connection_db
+        self._schedule_getter = schedule_getter
+
+    def _get_network(
+        self,
+        routes: Iterable[Route],
+        /,
+        *,
+        options: RoutePlansOptions,
+    ) -> tuple[dict[LocationId, list[FerryConnection]], dict[LocationId, list[CarConnection]]]:
+        """Get the ferry and car connections used by the routes, keyed by origin location ID."""
+        connections: dict[str, Connection] = {}
+        for route in routes:
+            for i in range(1, len(route)):
+                connection = self._connection_db.from_to_location(route[i - 1], route[i])
+                connections[connection.id] = connection
+        ferry_connections: dict[LocationId, list[FerryConnection]] = {}
+        car_connections: dict[LocationId, list[CarConnection]] = {}
+        for connection in connections.values():
+            if isinstance(connection, FerryConnection):
+                ferry_connections.setdefault(connection.origin.id, []).append(connection)
+            elif isinstance(connection, CarConnection):
+                # Skip driving segments that are more than 6 hours long.
+                if not options.show_all and connection.duration > DRIVING_DURATION_LIMIT:
+                    continue
+                car_connections.setdefault(connection.origin.id, []).append(connection)
+        return ferry_connections, car_connections
+
+    async def _get_sailings(
+        self,
+        connections: Iterable[FerryConnection],
+        /,
+        *,
+        day: datetime,
+    ) -> dict[str, Sailings]:
+        """Get the departure and arrival times of the sailings of each connection on a day."""
+        connections = tuple(connections)
+        schedules = await asyncio.gather(
+            *(self._schedule_getter(c.origin.id, c.destination.id, date=day) for c in connections),
+        )
+        sailings = {}
+        for connection, schedule in zip(connections, schedules, strict=True):
+            if not schedule:
+                continue
+            times = []
+            for departure, arrival in zip(schedule.departures, schedule.arrivals, strict=True):
+                depart_time = departure * 60
+                arrive_time = arrival * 60
+                if arrive_time < depart_time:
+                    arrive_time += SECONDS_PER_DAY
+                times.append((depart_time, arrive_time))
+            sailings[connection.id] = (times, schedule.url)
+        return sailings
+
+    async def make_route_plans(
+        self,
+        *,
+        routes: Iterable[Route],
+        options: RoutePlansOptions,
+    ) -> Sequence[RoutePlan]:
+        routes = tuple(routes)
+        if not routes:
+            return []
+        origin = routes[0][0]
+        destination = routes[0][-1]
+        ferry_connections, car_connections = self._get_network(routes, options=options)
+        day = options.date.replace(hour=0, minute=0, second=0, microsecond=0)
+        sailings = await self._get_sailings(
+            (connection for connections in ferry_connections.values() for connection in connections),
+            day=day,
+        )
+
+        # Pareto bags of all rounds, used to drop labels that are dominated by labels of earlier rounds.
+        bags: dict[LocationId, list[Label]] = {origin.id: []}
+        start = Label(arrival=0, driving=0, ferries=0, depart=None)
+        _add_label(bags[origin.id], start)
+        marked = self._transfer(
+            {origin.id: [start]},
+            bags=bags,
+            car_connections=car_connections,
+            destination=destination,
+        )
+        while marked:
+            reached: dict[LocationId, list[Label]] = {}
+            for location_id, labels in marked.items():
+                if location_id == destination.id:
+                    continue
+                for connection in ferry_connections.get(location_id, ()):
+                    connection_sailings = sailings.get(connection.id)
+                    if connection_sailings is None:
+                        continue
+                    for label in labels:
+                        for new_label in self._board(label, connection, connection_sailings, options=options):
+                            bag = bags.setdefault(connection.destination.id, [])
+                            if _add_label(bag, new_label):
+                                reached.setdefault(connection.destination.id, []).append(new_label)
+            marked = self._transfer(
+                reached,
+                bags=bags,
+                car_connections=car_connections,
+                destination=destination,
+            )
+        route_plans = [
+            self._make_route_plan(label, day=day, options=options) for label in bags.get(destination.id, ())
+        ]
+        return get_fastest_route_plans(route_plans, limit=options.limit)
+
+    async def iter_route_plans(
+        self,
+        *,
+        routes: Iterable[Route],
+        options: RoutePlansOptions,
+    ) -> AsyncIterator[RoutePlan]:
+        """Yield the same plans as `make_route_plans`.
+
+        All routes are searched at once, so the plans are only available when the search is finished.
+        """
+        for route_plan in await self.make_route_plans(routes=routes, options=options):
+            yield route_plan
+
+    def _board(
+        self,
+        label: Label,
+        connection: FerryConnection,
+        connection_sailings: Sailings,
+        /,
+        *,
+        options: RoutePlansOptions,
+    ) -> Iterable[Label]:
+        """Get the labels for taking a ferry connection after arriving at its terminal.
+
+        Before the first ferry, every sailing of the day starts a plan with a different departure time.
+        Later ferries are taken at the first sailing after arriving at the terminal.
+        """
+        times, schedule_url = connection_sailings
+        deadline_name, wait_minutes = get_check_in_deadline(connection, options=options)
+        wait = (wait_minutes + options.buffer) * 60
+        for depart_time, arrive_time in times:
+            if not options.show_all and arrive_time - label.arrival > SECONDS_PER_DAY:
+                break  # Skip routes that take more than one day.
+            deadline_time = depart_time - wait
+            if depart_time < label.arrival or deadline_time < label.arrival:
+                continue
+            depart = label.depart
+            if depart is None:
+                depart = min(deadline_time, depart_time) - label.driving
+            yield Label(
+                arrival=arrive_time,
+                driving=label.driving,
+                ferries=label.ferries + 1,
+                depart=depart,
+                parent=label,
+                leg=SegmentRecord(
+                    connection,
+                    min(deadline_time, depart_time),
+                    depart_time,
+                    arrive_time,
+                    deadline_name,
+                    schedule_url,
+                ),
+            )
+            if label.depart is not None:
+                break
+
+    def _transfer(
+        self,
+        reached: dict[LocationId, list[Label]],
+        /,
+        *,
+        bags: dict[LocationId, list[Label]],
+        car_connections: dict[LocationId, list[CarConnection]],
+        destination: Location,
+    ) -> dict[LocationId, list[Label]]:
+        """Add the labels for driving one car connection from the locations reached in a round."""
+        marked = {location_id: labels.copy() for location_id, labels in reached.items()}
+        for location_id, labels in reached.items():
+            if location_id == destination.id:
+                continue
+            for connection in car_connections.get(location_id, ()):
+                bag = bags.setdefault(connection.destination.id, [])
+                for label in labels:
+                    new_label = Label(
+                        arrival=label.arrival + connection.duration,
+                        driving=label.driving + connection.duration,
+                        ferries=label.ferries,
+                        depart=label.depart,
+                        parent=label,
+                        leg=SegmentRecord(
+                            connection,
+                            label.arrival,
+                            label.arrival,
+                            label.arrival + connection.duration,
+                        ),
+                    )
+                    if _add_label(bag, new_label):
+                        marked.setdefault(connection.destination.id, []).append(new_label)
+        # Labels may have been dominated by labels added later in the same round.
+        return {
+            location_id: live_labels
+            for location_id, labels in marked.items()
+            if (live_labels := [label for label in labels if label in bags[location_id]])
+        }
+
+    def _make_route_plan(self, label: Label, /, *, day: datetime, options: RoutePlansOptions) -> RoutePlan:
+        records: list[SegmentRecord] = []
+        while label.leg is not None:
+            records.append(label.leg)
+            if label.parent is None:
+                break
+            label = label.parent
+        records.reverse()
+        return RoutePlan.from_records(records, day=day, buffer=options.buffer)
@@ -2,27 +2,37 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
-from collections.abc import Generator, Iterable, Iterator, Sequence
-from copy import deepcopy
+import heapq
+import math
+from collections.abc import AsyncIterator, Generator, Iterable, Iterator, Sequence
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 from urllib.parse import quote
 
 from pydantic import BaseModel
 
 from ferry_planner.config import CONFIG
-from ferry_planner.connection import CarConnection, Connection, FerryConnection
-from ferry_planner.data import ConnectionNotFoundError
-from ferry_planner.location import City, Location
-from ferry_planner.utils import datetime_to_timedelta
+from ferry_planner.connection import CarConnection, Connection, ConnectionType, FerryConnection
+from ferry_planner.graph import CONNECTION_TYPE_CODES, NO_LAND_GROUP, ConnectionGraph
+from ferry_planner.location import Location
+from ferry_planner.utils import datetime_to_seconds
 
 if TYPE_CHECKING:
+    from ferry_planner.connection import ConnectionId
     from ferry_planner.data import ConnectionDB
     from ferry_planner.options import RoutePlansOptions
-    from ferry_planner.schedule import ScheduleGetter
+    from ferry_planner.schedule import CompactSchedule, ScheduleGetter
 
 Route = Sequence[Location]
+Sailings = tuple[list[tuple[int, int]], str]
+"""Departure and arrival times of the sailings of a connection, and the schedule URL."""
+
+DRIVING_DURATION_LIMIT = 6 * 60 * 60
+"""Driving segments longer than this many seconds are skipped unless `RoutePlansOptions.show_all` is set."""
+SECONDS_PER_DAY = 24 * 60 * 60
+CAR = CONNECTION_TYPE_CODES[ConnectionType.CAR]
+FERRY = CONNECTION_TYPE_CODES[ConnectionType.FERRY]
 
 
 class TimeIntervalType(Enum):
@@ -67,204 +77,378 @@ class RoutePlan(BaseModel):
     """Google Maps URL of the route."""
 
     @classmethod
-    def from_segments(cls, _segments: Iterable[RoutePlanSegment], /) -> RoutePlan:  # noqa: C901
-        segments = tuple(
-            RoutePlanSegment(
-                connection=segment.connection,
-                times=deepcopy(segment.times),
-                schedule_url=segment.schedule_url,
-            )
-            for segment in _segments
-        )
-        segments_len = len(segments)
-        if segments_len == 0:
+    def from_records(  # noqa: C901, PLR0912, PLR0915
+        cls,
+        records: Sequence[SegmentRecord],
+        /,
+        *,
+        day: datetime,
+        buffer: int,
+    ) -> RoutePlan:
+        """Create a route plan from the segment records of a plan.
+
+        `day` is the midnight that the record times are relative to,
+        and `buffer` is the buffer time in minutes used when the records were made.
+        """
+        records_len = len(records)
+        if records_len == 0:
             msg = "route plan must have at least one segment"
             raise ValueError(msg)
 
-        # If first segment is driving, we can shift it forward
-        # in order to arrive just in time for ferry.
-        first_segment = segments[0]
-        if isinstance(first_segment.connection, CarConnection) and segments_len > 1:
-            free_time = segments[1].times[0].start - first_segment.times[-1].end
-            for time in first_segment.times:
-                time.start += free_time
-                time.end += free_time
-
-        # If the only segment is car travel, make the start time the current time.
-        if isinstance(first_segment.connection, CarConnection) and segments_len == 1:
-            now = datetime.now(tz=CONFIG.timezone)
-            for t in first_segment.times:
-                t.start += datetime_to_timedelta(now)
-                t.end += datetime_to_timedelta(now)
+        first_record = records[0]
+        shift = 0
+        if isinstance(first_record.connection, CarConnection):
+            if records_len > 1:
+                # If first segment is driving, we can shift it forward
+                # in order to arrive just in time for ferry.
+                shift = records[1].start - first_record.arrive
+            else:
+                # If the only segment is car travel, make the start time the current time.
+                shift = datetime_to_seconds(datetime.now(tz=CONFIG.timezone))
+
+        # Times are `(type, start, end, description)` until the segments are created.
+        segments_times: list[list[tuple[TimeIntervalType, int, int, str]]] = []
+        for i, record in enumerate(records):
+            connection = record.connection
+            start, depart, arrive = record.start, record.depart, record.arrive
+            if i == 0:
+                start, depart, arrive = start + shift, depart + shift, arrive + shift
+            if isinstance(connection, FerryConnection):
+                times = [
+                    (
+                        TimeIntervalType.TRAVEL,
+                        depart,
+                        arrive,
+                        f"Ferry sailing from {connection.origin.name} to {connection.destination.name}",
+                    ),
+                ]
+                if start < depart:
+                    description = f"Arrive at {connection.origin.name} "
+                    if buffer > 0:
+                        description += f"{buffer} minutes "
+                    description += f"before {record.deadline_name}"
+                    times.insert(0, (TimeIntervalType.WAIT, start, depart, description))
+            else:
+                description = f"Drive {round(connection.distance)} km to {connection.destination.name}"
+                times = [(TimeIntervalType.TRAVEL, start, arrive, description)]
+            segments_times.append(times)
 
         # Add free time to segments.
-        for i in range(segments_len - 1):
-            free_start = segments[i].times[-1].end
-            free_end = segments[i + 1].times[0].start
-            free_time = free_end - free_start
-            if free_time.total_seconds() > 0:
-                segments[i].times = (
-                    *segments[i].times,
-                    TimeInterval(
-                        type=TimeIntervalType.FREE,
-                        start=free_start,
-                        end=free_end,
-                        description="Free time",
-                    ),
-                )
+        for i in range(records_len - 1):
+            free_start = segments_times[i][-1][2]
+            free_end = segments_times[i + 1][0][1]
+            if free_end > free_start:
+                segments_times[i].append((TimeIntervalType.FREE, free_start, free_end, "Free time"))
 
         # Add departure.
-        depart_time = first_segment.times[0].start
-        if not isinstance(first_segment.connection, FerryConnection):
-            first_segment.times = (
-                TimeInterval(
-                    type=TimeIntervalType.TRAVEL,
-                    start=depart_time,
-                    end=depart_time,
-                    description=f"Depart from {first_segment.connection.origin.name}",
-                ),
-                *first_segment.times,
-            )
+        depart_time = segments_times[0][0][1]
+        if not isinstance(first_record.connection, FerryConnection):
+            description = f"Depart from {first_record.connection.origin.name}"
+            segments_times[0].insert(0, (TimeIntervalType.TRAVEL, depart_time, depart_time, description))
 
         # Add arrival.
-        last_segment = segments[-1]
-        arrive_time = last_segment.times[-1].end
-        last_segment.times = (
-            *last_segment.times,
-            TimeInterval(
-                type=TimeIntervalType.TRAVEL,
-                start=arrive_time,
-                end=arrive_time,
-                description=f"Arrive at {last_segment.connection.destination.name}",
-            ),
-        )
+        last_record = records[-1]
+        arrive_time = segments_times[-1][-1][2]
+        description = f"Arrive at {last_record.connection.destination.name}"
+        segments_times[-1].append((TimeIntervalType.TRAVEL, arrive_time, arrive_time, description))
+
+        # Create segments and calculate distance and hash.
+        datetimes: dict[int, datetime] = {}
+
+        def to_datetime(seconds: int) -> datetime:
+            if seconds not in datetimes:
+                datetimes[seconds] = day + timedelta(seconds=seconds)
+            return datetimes[seconds]
 
-        # Calculate distance and hash.
+        segments = []
         driving_duration = 0
         driving_distance = 0.0
         plan_hash = hashlib.sha1(usedforsecurity=False)
-        for segment in segments:
-            if isinstance(segment.connection, CarConnection):
-                driving_duration += segment.connection.duration
-                driving_distance += segment.connection.distance
-            plan_hash.update(segment.connection.destination.id.encode("utf-8"))
-            for time in segment.times:
-                plan_hash.update(time.start.isoformat().encode("utf-8"))
+        for record, times in zip(records, segments_times, strict=True):
+            if isinstance(record.connection, CarConnection):
+                driving_duration += record.connection.duration
+                driving_distance += record.connection.distance
+            plan_hash.update(record.connection.destination.id.encode("utf-8"))
+            for _, start, _, _ in times:
+                plan_hash.update(to_datetime(start).isoformat().encode("utf-8"))
+            segments.append(
+                RoutePlanSegment(
+                    connection=record.connection,
+                    times=tuple(
+                        TimeInterval(
+                            type=interval_type,
+                            start=to_datetime(start),
+                            end=to_datetime(end),
+                            description=description,
+                        )
+                        for interval_type, start, end, description in times
+                    ),
+                    schedule_url=record.schedule_url,
+                ),
+            )
 
         # Create Google Maps URL.
         url = "https://www.google.com/maps/dir/?api=1&origin={origin}&destination={destination}&waypoints={waypoints}"
-        waypoints = (segment.connection.origin.map_parameter for segment in segments[1:])
+        waypoints = (record.connection.origin.map_parameter for record in records[1:])
         map_url = url.format(
-            origin=quote(first_segment.connection.origin.map_parameter),
-            destination=quote(last_segment.connection.destination.map_parameter),
+            origin=quote(first_record.connection.origin.map_parameter),
+            destination=quote(last_record.connection.destination.map_parameter),
             waypoints=quote("|".join(waypoints)),
         )
 
         return cls(
-            segments=segments,
+            segments=tuple(segments),
             hash=plan_hash.hexdigest(),
-            duration=int((arrive_time - depart_time).total_seconds()),
-            depart_time=depart_time,
-            arrive_time=arrive_time,
+            duration=arrive_time - depart_time,
+            depart_time=to_datetime(depart_time),
+            arrive_time=to_datetime(arrive_time),
             driving_duration=driving_duration,
             driving_distance=driving_distance,
             map_url=map_url,
         )
 
 
+class RoutePlansSummary(BaseModel):
+    """Last record of a streamed list of route plans."""
+
+    count: int
+    """Number of route plans sent."""
+    elapsed: float
+    """Seconds taken to plan the routes."""
+
+
+class SegmentRecord(NamedTuple):
+    """Lightweight segment of a plan that is being built, see `RoutePlan.from_records`.
+
+    Times are in seconds since the midnight of the day the plan starts on, in wall-clock time,
+    the same as adding a `timedelta` to an aware `datetime`.
+    """
+
+    connection: Connection
+    start: int
+    """Start time, for ferries this is when to arrive at the terminal."""
+    depart: int
+    arrive: int
+    deadline_name: str = ""
+    """Name of the check-in deadline for ferries."""
+    schedule_url: str | None = None
+
+
+def get_fastest_route_plans(route_plans: list[RoutePlan], /, *, limit: int | None) -> list[RoutePlan]:
+    """Get the `limit` fastest plans sorted by duration, or all plans unchanged if `limit` is `None`."""
+    if limit is None:
+        return route_plans
+    return sorted(route_plans, key=lambda plan: plan.duration)[:limit]
+
+
+def get_depart_time(records: Sequence[SegmentRecord], /) -> int:
+    """Get the departure time of a plan, after its first car segment is shifted (see `RoutePlan.from_records`)."""
+    for i, record in enumerate(records):
+        if isinstance(record.connection, FerryConnection):
+            return record.start - sum(r.arrive - r.start for r in records[:i])
+    return records[0].start
+
+
+def get_check_in_deadline(connection: FerryConnection, /, *, options: RoutePlansOptions) -> tuple[str, int]:
+    """Get the name of the check-in deadline of a ferry connection and its number of minutes before departure."""
+    departure_terminal = connection.origin
+    deadline_name = "departure"
+    wait_minutes = 0
+    if options.hostled and departure_terminal.hostled_close and departure_terminal.hostled_close > 0:
+        deadline_name = "hostled vehicles check-in close"
+        wait_minutes = departure_terminal.hostled_close
+    if options.assured and departure_terminal.assured_close and departure_terminal.assured_close > 0:
+        deadline_name = "assured loading check-in close"
+        wait_minutes = departure_terminal.assured_close
+    elif departure_terminal.res_close and departure_terminal.res_close > 0 and connection.bookable:
+        deadline_name = "booking check-in close"
+        wait_minutes = departure_terminal.res_close
+    elif departure_terminal.veh_close and departure_terminal.veh_close > 0:
+        deadline_name = "vehicles check-in close"
+        wait_minutes = departure_terminal.veh_close
+    elif departure_terminal.foot_close and departure_terminal.foot_close > 0:
+        deadline_name = "foot passengers check-in close"
+        wait_minutes = departure_terminal.foot_close
+    return deadline_name, wait_minutes
+
+
 class RouteBuilder:
     def __init__(self, connection_db: ConnectionDB, /) -> None:
         self._connection_db = connection_db
+        self._graph = ConnectionGraph.from_connection_db(connection_db)
 
     def find_routes(self, *, origin: Location, destination: Location) -> Iterator[Route]:
-        return self._find_routes_recurse(next_point=origin, end_point=destination)
+        graph = self._graph
+        origin_index = graph.location_indexes.get(origin.id)
+        destination_index = graph.location_indexes.get(destination.id)
+        if origin_index is None or destination_index is None:
+            return
+        routes = self._find_routes_recurse(
+            next_point=origin_index,
+            end_point=destination_index,
+            current_route=[],
+            on_route=bytearray(len(graph.locations)),
+            dead_ends=set(),
+            lands=[0] * graph.land_groups_count,
+            last_connection_type=None,
+        )
+        for route in routes:
+            yield [graph.locations[i] for i in route]
 
-    def _find_routes_recurse(  # noqa: C901, PLR0912, PLR0913
+    def _find_routes_recurse(  # noqa: C901, PLR0913
         self,
         *,
-        next_point: Location,
-        end_point: Location,
-        current_route: list[Location] | None = None,
-        dead_ends: set[Connection] | None = None,
-        lands: list[str] | None = None,
-        last_connection_type: type[Connection] = Connection,
-    ) -> Generator[Route, None, bool]:
-        if current_route is None:
-            current_route = []
-        if dead_ends is None:
-            dead_ends = set()
-        if lands is None:
-            lands = []
+        next_point: int,
+        end_point: int,
+        current_route: list[int],
+        on_route: bytearray,
+        dead_ends: set[int],
+        lands: list[int],
+        last_connection_type: int | None,
+    ) -> Generator[list[int], None, bool]:
+        """Search routes over the arrays of `ConnectionGraph`.
+
+        Locations and connections are referred to by their indexes in the graph.
+        `on_route` flags the locations in `current_route`, `dead_ends` holds edges
+        that are known to not lead to the end point, and `lands` counts the land groups
+        that have been left by ferry on the current route.
+        """
+        graph = self._graph
         current_route.append(next_point)
         if next_point == end_point:
             yield current_route.copy()
             del current_route[-1]
             return True
-        if isinstance(end_point, City):
-            # Check if a connection exists between the current location and the end point.
-            try:
-                _ = self._connection_db.from_to_location(next_point, end_point)
-            except ConnectionNotFoundError:
-                pass
-            else:
-                current_route.append(end_point)
-                yield current_route.copy()
-                del current_route[-2:]
-                return True
+        # Check if a connection exists between the current location and the end point.
+        if graph.is_city[end_point] and graph.pair_key(next_point, end_point) in graph.edge_indexes:
+            current_route.append(end_point)
+            yield current_route.copy()
+            del current_route[-2:]
+            return True
+        on_route[next_point] = True
         result = False
-        for connection in self._connection_db.from_location(next_point):
-            if connection.destination in current_route or connection in dead_ends:
+        for edge in range(graph.offsets[next_point], graph.offsets[next_point + 1]):
+            destination = graph.targets[edge]
+            if on_route[destination] or edge in dead_ends:
                 continue
-            if isinstance(connection, CarConnection) and last_connection_type is CarConnection:
+            connection_type = graph.types[edge]
+            if connection_type == CAR and last_connection_type == CAR:
                 continue  # Drive only shortest way between terminals.
-            if (
-                isinstance(connection, FerryConnection)
-                and connection.destination.land_group
-                and connection.destination.land_group in lands
-            ):
-                continue
-            if isinstance(connection, FerryConnection) and connection.origin.land_group:
-                lands.append(connection.origin.land_group)
-            else:
-                lands.append("")
+            land_group = NO_LAND_GROUP
+            if connection_type == FERRY:
+                if graph.land_groups[destination] != NO_LAND_GROUP and lands[graph.land_groups[destination]]:
+                    continue
+                land_group = graph.land_groups[next_point]
+            if land_group != NO_LAND_GROUP:
+                lands[land_group] += 1
             recursion_result = yield from self._find_routes_recurse(
-                next_point=connection.destination,
+                next_point=destination,
                 end_point=end_point,
                 current_route=current_route,
+                on_route=on_route,
                 dead_ends=dead_ends,
                 lands=lands,
-                last_connection_type=type(connection),
+                last_connection_type=connection_type,
             )
             if recursion_result is True:
                 result = True
             else:
-                dead_ends.add(connection)
-            del lands[-1]
+                dead_ends.add(edge)
+            if land_group != NO_LAND_GROUP:
+                lands[land_group] -= 1
+        on_route[next_point] = False
         del current_route[-1]
         return result
 
 
 class RoutePlanBuilder:
-    def __init__(self, *, connection_db: ConnectionDB, schedule_getter: ScheduleGetter) -> None:
+    def __init__(
+        self,
+        *,
+        connection_db: ConnectionDB,
+        schedule_getter: ScheduleGetter,
+        concurrency: int = 16,
+    ) -> None:
+        """`concurrency` is the maximum number of routes planned at the same time."""
         self._connection_db = connection_db
         self._schedule_getter = schedule_getter
+        self._concurrency = concurrency
 
-    async def _pre_cache_schedules(
+    def _start_schedule_downloads(
         self,
         *,
         routes: Iterable[Route],
         options: RoutePlansOptions,
-    ) -> None:
-        connections: set[FerryConnection] = set()
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]],
+    ) -> list[tuple[Route, list[asyncio.Task[CompactSchedule | None]]]]:
+        """Start downloading the schedules used by each route, each schedule only once.
+
+        The downloads are added to `downloads` by connection and day index, for `_get_sailings`.
+        """
+        # All ferries of a plan depart on the same day (see `_add_ferry_connection`),
+        # so this fetches every schedule that planning the routes can use.
+        route_downloads: list[tuple[Route, list[asyncio.Task[CompactSchedule | None]]]] = []
         for route in routes:
+            route_downloads.append((route, []))
             for i in range(1, len(route)):
-                origin = route[i - 1]
-                destination = route[i]
-                connection = self._connection_db.from_to_location(origin, destination)
-                if isinstance(connection, FerryConnection):
-                    connections.add(connection)
-        tasks = [self._schedule_getter(c.origin.id, c.destination.id, date=options.date) for c in connections]
-        await asyncio.gather(*tasks)
+                connection = self._connection_db.from_to_location(route[i - 1], route[i])
+                if not isinstance(connection, FerryConnection):
+                    continue
+                key = (connection.id, 0)
+                if key not in downloads:
+                    downloads[key] = asyncio.ensure_future(
+                        self._schedule_getter(connection.origin.id, connection.destination.id, date=options.date),
+                    )
+                route_downloads[-1][1].append(downloads[key])
+        return route_downloads
+
+    def _start_route_plans(
+        self,
+        *,
+        routes: Iterable[Route],
+        options: RoutePlansOptions,
+    ) -> list[asyncio.Task[list[RoutePlan]]]:
+        """Start planning the routes, each route as soon as the schedules it uses are downloaded."""
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]] = {}
+        route_downloads = self._start_schedule_downloads(routes=routes, options=options, downloads=downloads)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        day = options.date.replace(hour=0, minute=0, second=0, microsecond=0)
+        sailings: dict[tuple[ConnectionId, int], Sailings | None] = {}
+        # Min-heap of the negated durations of the `options.limit` fastest plans found so far, shared by all routes.
+        best_durations: list[int] = []
+
+        async def make_plans(route: Route, schedules: list[asyncio.Task[CompactSchedule | None]]) -> list[RoutePlan]:
+            if schedules:
+                # Unlike `asyncio.gather`, this does not cancel the downloads shared with other routes
+                # when planning this route is cancelled.
+                await asyncio.wait(schedules)
+            plans: list[tuple[SegmentRecord, ...]] = []
+            async with semaphore:
+                bounds = None
+                if options.limit is not None:
+                    bounds = await self._get_duration_bounds(
+                        route,
+                        day=day,
+                        sailings=sailings,
+                        downloads=downloads,
+                        options=options,
+                    )
+                await self._add_plan_segment(
+                    plans=plans,
+                    route=route,
+                    destination_index=1,
+                    start_time=0,
+                    day=day,
+                    sailings=sailings,
+                    downloads=downloads,
+                    options=options,
+                    bounds=bounds,
+                    best_durations=best_durations,
+                )
+            # Models are only created for the finished plans, not for the partial plans tried while searching.
+            return [RoutePlan.from_records(records, day=day, buffer=options.buffer) for records in plans]
+
+        return [asyncio.create_task(make_plans(route, schedules)) for route, schedules in route_downloads]
 
     async def make_route_plans(
         self,
@@ -272,168 +456,282 @@ class RoutePlanBuilder:
         routes: Iterable[Route],
         options: RoutePlansOptions,
     ) -> Sequence[RoutePlan]:
-        routes = tuple(routes)
-        await self._pre_cache_schedules(routes=routes, options=options)
-        route_plans = []
-        for route in routes:
-            await self._add_plan_segment(
-                route_plans=route_plans,
-                route=route,
-                destination_index=1,
-                start_time=options.date.replace(hour=0, minute=0, second=0, microsecond=0),
-                options=options,
+        # Plans are collected per route, so that the order does not depend on which route finishes first.
+        results = await asyncio.gather(*self._start_route_plans(routes=routes, options=options))
+        route_plans = [route_plan for route_plans in results for route_plan in route_plans]
+        return get_fastest_route_plans(route_plans, limit=options.limit)
+
+    async def iter_route_plans(
+        self,
+        *,
+        routes: Iterable[Route],
+        options: RoutePlansOptions,
+    ) -> AsyncIterator[RoutePlan]:
+        """Yield the same plans as `make_route_plans`, the plans of each route as soon as it is planned.
+
+        With `options.limit`, any plan may still be beaten by a plan of a route that is not planned yet,
+        so the plans are only yielded when all routes are planned.
+        """
+        if options.limit is not None:
+            for route_plan in await self.make_route_plans(routes=routes, options=options):
+                yield route_plan
+            return
+        tasks = self._start_route_plans(routes=routes, options=options)
+        try:
+            for task in asyncio.as_completed(tasks):
+                for route_plan in await task:
+                    yield route_plan
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_sailings(
+        self,
+        connection: FerryConnection,
+        /,
+        *,
+        day: datetime,
+        day_index: int,
+        sailings: dict[tuple[ConnectionId, int], Sailings | None],
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]],
+    ) -> Sailings | None:
+        """Get the departure and arrival times of the sailings of a connection on the day with index `day_index`.
+
+        Uses the download in `downloads` if there is one, otherwise starts it and adds it there.
+        """
+        key = (connection.id, day_index)
+        if key in sailings:
+            return sailings[key]
+        task = downloads.get(key)
+        if task is None:
+            date = day + timedelta(days=day_index)
+            task = downloads[key] = asyncio.ensure_future(
+                self._schedule_getter(connection.origin.id, connection.destination.id, date=date),
             )
-        return route_plans
+        if not task.done():
+            # Unlike awaiting the task, this does not cancel it for other routes when planning this route is cancelled.
+            await asyncio.wait((task,))
+        schedule = task.result()
+        if not schedule:
+            sailings[key] = None
+            return None
+        times = []
+        offset = day_index * SECONDS_PER_DAY
+        for departure, arrival in zip(schedule.departures, schedule.arrivals, strict=True):
+            depart_time = offset + departure * 60
+            arrive_time = offset + arrival * 60
+            if arrive_time < depart_time:
+                arrive_time += SECONDS_PER_DAY
+            times.append((depart_time, arrive_time))
+        sailings[key] = (times, schedule.url)
+        return sailings[key]
+
+    async def _get_duration_bounds(
+        self,
+        route: Route,
+        /,
+        *,
+        day: datetime,
+        sailings: dict[tuple[ConnectionId, int], Sailings | None],
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]],
+        options: RoutePlansOptions,
+    ) -> list[int]:
+        """Get lower bounds of the time it takes to travel from each location of a route to its end.
+
+        Ferries are bounded by their check-in time and the shortest sailing of the day,
+        because the nominal connection duration may be longer than some sailings.
+        """
+        bounds = [0] * len(route)
+        for i in range(len(route) - 1, 0, -1):
+            connection = self._connection_db.from_to_location(route[i - 1], route[i])
+            bound = connection.duration
+            if isinstance(connection, FerryConnection):
+                connection_sailings = await self._get_sailings(
+                    connection,
+                    day=day,
+                    day_index=0,
+                    sailings=sailings,
+                    downloads=downloads,
+                )
+                times = connection_sailings[0] if connection_sailings else ()
+                _, wait_minutes = get_check_in_deadline(connection, options=options)
+                bound = (wait_minutes + options.buffer) * 60
+                bound += min((arrive_time - depart_time for depart_time, arrive_time in times), default=0)
+            bounds[i - 1] = bounds[i] + bound
+        return bounds
 
     async def _add_plan_segment(  # noqa: PLR0913
         self,
         *,
-        route_plans: list[RoutePlan],
+        plans: list[tuple[SegmentRecord, ...]],
         route: Route,
         destination_index: int,
-        start_time: datetime,
+        start_time: int,
+        day: datetime,
+        sailings: dict[tuple[ConnectionId, int], Sailings | None],
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]],
         options: RoutePlansOptions,
-        segments: list[RoutePlanSegment] | None = None,
+        bounds: Sequence[int] | None,
+        best_durations: list[int],
+        records: list[SegmentRecord] | None = None,
     ) -> bool:
-        if segments is None:
-            segments = []
+        if records is None:
+            records = []
         result = False
         try:
             if destination_index == len(route):
-                if not segments:  # empty list?
+                if not records:  # empty list?
                     return False  # can we be here?
-                route_plans.append(RoutePlan.from_segments(segments))
+                plans.append(tuple(records))
+                if options.limit is not None:
+                    duration = records[-1].arrive - get_depart_time(records)
+                    if len(best_durations) < options.limit:
+                        heapq.heappush(best_durations, -duration)
+                    elif -duration > best_durations[0]:
+                        heapq.heapreplace(best_durations, -duration)
                 return True
             origin = route[destination_index - 1]
             destination = route[destination_index]
             connection = self._connection_db.from_to_location(origin, destination)
             if isinstance(connection, FerryConnection):
                 result = await self._add_ferry_connection(
-                    route_plans=route_plans,
+                    plans=plans,
                     route=route,
                     destination_index=destination_index,
-                    segments=segments,
+                    records=records,
                     start_time=start_time,
+                    day=day,
+                    sailings=sailings,
+                    downloads=downloads,
                     options=options,
+                    bounds=bounds,
+                    best_durations=best_durations,
                     connection=connection,
                 )
             if isinstance(connection, CarConnection):
-                driving_duration_limit = 6 * 60 * 60
                 # Skip driving segments that are more than 6 hours long.
-                if not options.show_all and connection.duration > driving_duration_limit:
+                if not options.show_all and connection.duration > DRIVING_DURATION_LIMIT:
                     return False
-                arrive_time = start_time + timedelta(seconds=connection.duration)
-                times = (
-                    TimeInterval(
-                        type=TimeIntervalType.TRAVEL,
-                        start=start_time,
-                        end=arrive_time,
-                        description=f"Drive {round(connection.distance)} km to {connection.destination.name}",
-                    ),
-                )
-                segments.append(RoutePlanSegment(connection=connection, times=times))
+                arrive_time = start_time + connection.duration
+                records.append(SegmentRecord(connection, start_time, start_time, arrive_time))
                 result = await self._add_plan_segment(
-                    route_plans=route_plans,
+                    plans=plans,
                     route=route,
                     destination_index=destination_index + 1,
-                    segments=segments,
+                    records=records,
                     start_time=arrive_time,
+                    day=day,
+                    sailings=sailings,
+                    downloads=downloads,
                     options=options,
+                    bounds=bounds,
+                    best_durations=best_durations,
                 )
         finally:
             delete_start = destination_index - 1
-            del segments[delete_start:]
+            del records[delete_start:]
         return result
 
     async def _add_ferry_connection(  # noqa: C901, PLR0912, PLR0913
         self,
         *,
-        route_plans: list[RoutePlan],
+        plans: list[tuple[SegmentRecord, ...]],
         route: Route,
         destination_index: int,
-        segments: list[RoutePlanSegment],
-        start_time: datetime,
+        records: list[SegmentRecord],
+        start_time: int,
+        day: datetime,
+        sailings: dict[tuple[ConnectionId, int], Sailings | None],
+        downloads: dict[tuple[ConnectionId, int], asyncio.Task[CompactSchedule | None]],
         options: RoutePlansOptions,
+        bounds: Sequence[int] | None,
+        best_durations: list[int],
         connection: FerryConnection,
     ) -> bool:
         result = False
-        departure_terminal = connection.origin
-        start_day = segments[0].times[0].start.day if segments else start_time.day
-        day = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-        schedule = await self._schedule_getter(connection.origin.id, connection.destination.id, date=day)
-        if not schedule:
+        start_day = (records[0].start if records else start_time) // SECONDS_PER_DAY
+        day_index = start_time // SECONDS_PER_DAY
+        if day_index != start_day:
+            # Skip routes that take more than one day,
+            # without fetching the next day's schedule that would not be used.
             return False
-        for sailing in schedule.sailings:
-            depart_time = day + datetime_to_timedelta(sailing.departure)
-            arrive_time = day + datetime_to_timedelta(sailing.arrival)
-            if arrive_time < depart_time:
-                arrive_time += timedelta(days=1)
-            if (not options.show_all and (arrive_time - start_time > timedelta(days=1))) or day.day != start_day:
+        connection_sailings = await self._get_sailings(
+            connection,
+            day=day,
+            day_index=day_index,
+            sailings=sailings,
+            downloads=downloads,
+        )
+        if connection_sailings is None:
+            return False
+        times, schedule_url = connection_sailings
+        deadline_name, wait_minutes = get_check_in_deadline(connection, options=options)
+        wait = (wait_minutes + options.buffer) * 60
+        # The departure time of a plan is set by its first ferry.
+        has_ferry = any(isinstance(r.connection, FerryConnection) for r in records)
+        plan_depart_time = get_depart_time(records) if has_ferry else 0
+        # Earliest arrival of the sailings after each sailing, since a later sailing can overtake an earlier one,
+        # for example if it has no stops.
+        later_arrive_times = [math.inf] * len(times)
+        for i in range(len(times) - 2, -1, -1):
+            later_arrive_times[i] = min(times[i + 1][1], later_arrive_times[i + 1])
+        # Without `show_all`, only the first sailing that can be caught after the first ferry is planned,
+        # and the later sailings that arrive sooner than it.
+        first_only = not options.show_all and has_ferry
+        earliest_arrive_time = math.inf
+        for (depart_time, arrive_time), later_arrive_time in zip(times, later_arrive_times, strict=True):
+            if not options.show_all and (arrive_time - start_time > SECONDS_PER_DAY):
                 break  # Skip routes that take more than one day.
             if depart_time < start_time:
                 continue
-            deadline_name = "departure"
-            wait_minutes = 0
-            if options.hostled and departure_terminal.hostled_close and departure_terminal.hostled_close > 0:
-                deadline_name = "hostled vehicles check-in close"
-                wait_minutes = departure_terminal.hostled_close
-            if options.assured and departure_terminal.assured_close and departure_terminal.assured_close > 0:
-                deadline_name = "assured loading check-in close"
-                wait_minutes = departure_terminal.assured_close
-            elif departure_terminal.res_close and departure_terminal.res_close > 0 and connection.bookable:
-                deadline_name = "booking check-in close"
-                wait_minutes = departure_terminal.res_close
-            elif departure_terminal.veh_close and departure_terminal.veh_close > 0:
-                deadline_name = "vehicles check-in close"
-                wait_minutes = departure_terminal.veh_close
-            elif departure_terminal.foot_close and departure_terminal.foot_close > 0:
-                deadline_name = "foot passengers check-in close"
-                wait_minutes = departure_terminal.foot_close
-            deadline_time = depart_time - timedelta(minutes=wait_minutes) - timedelta(minutes=options.buffer)
+            deadline_time = depart_time - wait
             if deadline_time < start_time:
                 continue
-            times = (
-                TimeInterval(
-                    type=TimeIntervalType.TRAVEL,
-                    start=depart_time,
-                    end=arrive_time,
-                    description=f"Ferry sailing from {connection.origin.name} to {connection.destination.name}",
-                ),
-            )
-            if deadline_time < depart_time:
-                description = f"Arrive at {connection.origin.name} "
-                if options.buffer > 0:
-                    description += f"{options.buffer} minutes "
-                description += f"before {deadline_name}"
-                times = (
-                    TimeInterval(
-                        type=TimeIntervalType.WAIT,
-                        start=deadline_time,
-                        end=depart_time,
-                        description=description,
-                    ),
-                    *times,
-                )
-            segments.append(
-                RoutePlanSegment(
-                    connection=connection,
-                    times=times,
-                    schedule_url=schedule.url,
+            if first_only:
+                if arrive_time >= earliest_arrive_time:
+                    continue
+                earliest_arrive_time = arrive_time
+            if bounds is not None and len(best_durations) == options.limit:
+                if not has_ferry:
+                    plan_depart_time = min(deadline_time, depart_time) - sum(r.arrive - r.start for r in records)
+                if arrive_time + bounds[destination_index] - plan_depart_time > -best_durations[0]:
+                    # Every plan continuing with this sailing is slower than the fastest plans found so far.
+                    result = True
+                    if (
+                        has_ferry
+                        and later_arrive_time + bounds[destination_index] - plan_depart_time > -best_durations[0]
+                    ):
+                        # Later sailings are all slower too.
+                        break
+                    continue
+            records.append(
+                SegmentRecord(
+                    connection,
+                    min(deadline_time, depart_time),
+                    depart_time,
+                    arrive_time,
+                    deadline_name,
+                    schedule_url,
                 ),
             )
             recursion_result = await self._add_plan_segment(
-                route_plans=route_plans,
+                plans=plans,
                 route=route,
                 destination_index=destination_index + 1,
-                segments=segments,
+                records=records,
                 start_time=arrive_time,
+                day=day,
+                sailings=sailings,
+                downloads=downloads,
                 options=options,
+                bounds=bounds,
+                best_durations=best_durations,
             )
-            if recursion_result is False:
-                break
             delete_start = destination_index - 1
-            del segments[delete_start:]
-            result = True
-            if not options.show_all and sum(1 for s in segments if isinstance(s.connection, FerryConnection)) > 0:
+            del records[delete_start:]
+            result = result or recursion_result
+            if later_arrive_time >= arrive_time and (first_only or not recursion_result):
+                # Later sailings arrive later, so they are not planned without `show_all`,
+                # and cannot lead to a plan if this one did not.
                 break
         return result
@@ -0,0 +1,198 @@
+"""Table of the routes between origin/destination pairs.
+
+The routes found by `RouteBuilder` depend only on the static connection data, so they are
+computed once per origin/destination pair, when the pair is first requested, and kept in memory
+up to `max_pairs` pairs, dropping the least recently used ones.
+The table is persisted next to the data files, keyed by the hash of the data files
+(see `ferry_planner.snapshot.get_source_hash`) so that it is discarded when the data changes.
+It is saved every `save_interval` seconds while `start_autosave` runs, so that a process that is killed
+loses at most the pairs computed since the last save.
+
+Each route is stored as the bytes of an `array("H")` of indexes into the table's list of location IDs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import marshal
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from pathlib import Path
+
+    from ferry_planner.data import LocationDB
+    from ferry_planner.location import Location, LocationId
+    from ferry_planner.route import Route, RouteBuilder
+
+ROUTE_TABLE_MAGIC = b"FPROUT"
+ROUTE_TABLE_VERSION = 1
+"""Increment when the file format or the route search changes."""
+
+logger = logging.getLogger(__name__)
+
+
+class RouteTable:
+    def __init__(  # noqa: PLR0913
+        self,
+        route_builder: RouteBuilder,
+        /,
+        *,
+        location_db: LocationDB,
+        path: Path,
+        source_hash: str,
+        max_pairs: int,
+        save_interval: float,
+    ) -> None:
+        self._route_builder = route_builder
+        self._location_db = location_db
+        self.path = path
+        self._source_hash = source_hash
+        self.max_pairs = max_pairs
+        """Maximum number of origin/destination pairs kept in memory and saved."""
+        self.save_interval = save_interval
+        """Seconds between saves while `start_autosave` runs."""
+        self._location_ids: list[LocationId] = []
+        self._locations: list[Location] = []
+        self._location_indexes: dict[LocationId, int] = {}
+        self._routes: OrderedDict[tuple[LocationId, LocationId], tuple[bytes, ...]] = OrderedDict()
+        """Encoded routes of each pair, least recently used first."""
+        # `save` runs in a thread while the autosave task runs.
+        self._lock = threading.Lock()
+        self._unsaved = False
+        self._autosave_task: asyncio.Task[None] | None = None
+        self._load()
+
+    def _get_header(self) -> bytes:
+        return ROUTE_TABLE_MAGIC + ROUTE_TABLE_VERSION.to_bytes(2, "big") + bytes.fromhex(self._source_hash)
+
+    def _read(self) -> tuple[list[LocationId], dict[tuple[LocationId, LocationId], tuple[bytes, ...]]] | None:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        header = self._get_header()
+        if not data.startswith(header):
+            logger.info("route table '%s' is stale, discarding it", self.path)
+            return None
+        try:
+            # The route table is a local cache file created by `save`, not untrusted input.
+            location_ids, routes = marshal.loads(data[len(header) :])  # noqa: S302
+        except (EOFError, ValueError, TypeError):
+            logger.warning("route table '%s' is corrupt, discarding it", self.path)
+            return None
+        return location_ids, routes
+
+    def _load(self) -> None:
+        table = self._read()
+        if table is not None:
+            with self._lock:
+                self._merge(*table)
+            logger.info("loaded %d origin/destination pairs from route table '%s'", len(self._routes), self.path)
+
+    def _merge(
+        self,
+        location_ids: Sequence[LocationId],
+        routes: dict[tuple[LocationId, LocationId], tuple[bytes, ...]],
+        /,
+    ) -> None:
+        """Add pairs that are not in the table yet from another table, as the least recently used ones."""
+        remap = [self._add_location_id(location_id) for location_id in location_ids]
+        identity = remap == list(range(len(remap)))
+        # Pairs are added to the start in reverse to keep their order, and only as many as fit.
+        for pair, encoded_routes in reversed(routes.items()):
+            if len(self._routes) >= self.max_pairs:
+                break
+            if pair in self._routes:
+                continue
+            if identity:
+                self._routes[pair] = encoded_routes
+            else:
+                self._routes[pair] = tuple(
+                    array("H", (remap[i] for i in array("H", encoded_route))).tobytes()
+                    for encoded_route in encoded_routes
+                )
+            self._routes.move_to_end(pair, last=False)
+
+    def save(self) -> None:
+        """Write the table to disk, merging it with pairs saved by other processes."""
+        if not self._unsaved:
+            return
+        # Computing routes is deterministic, so pairs saved by other processes can be merged as is.
+        table = self._read()
+        with self._lock:
+            if table is not None:
+                self._merge(*table)
+            payload = marshal.dumps((list(self._location_ids), dict(self._routes)))
+            pair_count = len(self._routes)
+            self._unsaved = False
+        # Every process and thread saving at the same time writes its own temporary file.
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(self._get_header() + payload)
+        tmp_path.replace(self.path)
+        logger.info("saved %d origin/destination pairs to route table '%s'", pair_count, self.path)
+
+    def start_autosave(self) -> None:
+        """Save the table every `save_interval` seconds, in a thread.
+
+        Runs as a task on the running event loop, stop it with `stop_autosave`.
+        """
+        if self._autosave_task is None:
+            self._autosave_task = asyncio.create_task(self._autosave_loop())
+
+    async def stop_autosave(self) -> None:
+        if self._autosave_task is not None:
+            self._autosave_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._autosave_task
+            self._autosave_task = None
+
+    async def _autosave_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await asyncio.to_thread(self.save)
+            except Exception:
+                logger.exception("failed to save route table '%s'", self.path)
+
+    def _add_location_id(self, location_id: LocationId, /) -> int:
+        index = self._location_indexes.get(location_id)
+        if index is None:
+            index = self._location_indexes[location_id] = len(self._location_ids)
+            self._location_ids.append(location_id)
+            self._locations.append(self._location_db.by_id(location_id))
+        return index
+
+    def _encode(self, route: Iterable[LocationId], /) -> bytes:
+        return array("H", (self._add_location_id(location_id) for location_id in route)).tobytes()
+
+    def _decode(self, encoded_route: bytes, /) -> Route:
+        return [self._locations[i] for i in array("H", encoded_route)]
+
+    def find_routes(self, *, origin: Location, destination: Location) -> Sequence[Route]:
+        """Get the routes between two locations, the same as `RouteBuilder.find_routes`."""
+        pair = (origin.id, destination.id)
+        with self._lock:
+            encoded_routes = self._routes.get(pair)
+            if encoded_routes is not None:
+                self._routes.move_to_end(pair)
+                return [self._decode(encoded_route) for encoded_route in encoded_routes]
+        routes = list(self._route_builder.find_routes(origin=origin, destination=destination))
+        with self._lock:
+            self._routes[pair] = tuple(self._encode(location.id for location in route) for route in routes)
+            while len(self._routes) > self.max_pairs:
+                self._routes.popitem(last=False)
+            self._unsaved = True
+        return routes
+
+    def build(self, pairs: Iterable[tuple[Location, Location]], /) -> None:
+        """Compute the routes for the given origin/destination pairs ahead of time."""
+        for origin, destination in pairs:
+            if (origin.id, destination.id) not in self._routes:
+                self.find_routes(origin=origin, destination=destination)
@@ -1,21 +1,33 @@
 import asyncio
+import calendar
+import contextlib
+import hashlib
 import itertools
+import json
 import logging
-import os
-import time
-from collections.abc import Iterable, Sequence
-from datetime import datetime, timedelta
+import multiprocessing
+import random
+import re
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time, timedelta
+from functools import partial
 from pathlib import Path
-from threading import Thread
-from typing import Protocol
+from typing import ClassVar, Literal, NamedTuple, Protocol, TypeVar
 
 import httpx
 from bs4 import BeautifulSoup, Tag
 from pydantic import BaseModel
 
+from ferry_planner.cache import CacheStats, LRUCache
 from ferry_planner.config import CONFIG
 from ferry_planner.connection import FerryConnection
 from ferry_planner.location import LocationId
+from ferry_planner.schedule_store import ScheduleStore, open_schedule_store
+from ferry_planner.scraper import ScraperClient, ScraperStats
 from ferry_planner.utils import datetime_to_timedelta
 
 MONTHS = (
@@ -46,6 +58,22 @@ NO_SAILINGS_MESSAGES = (
     "Schedules for your selected date and route are currently unavailable",
 )
 
+SCHEDULE_ELEMENT_PATTERN = re.compile(
+    r"<(\w+)[^>]*\s(?i:id)\s*=\s*[\"']?(dailyScheduleTableOnward|dateRangeModal|seasonalSchedulesForm)(?=[\"'\s>])",
+)
+"""Elements of a schedule page that schedules are parsed from."""
+
+COMMENT_RULES_CACHE_SIZE = 1024
+"""Number of distinct sailing comments kept compiled, see `ScheduleParser.compile_sailing_comment`."""
+
+COMPACT_SCHEDULE_VERSION = 1
+"""Version of the format written by `CompactSchedule.dump_json`."""
+
+ScheduleKey = tuple[LocationId, LocationId, str]
+"""Origin, destination and ISO date of a schedule."""
+UnavailableReason = Literal["download_error", "parse_error", "not_posted"]
+T = TypeVar("T")
+
 
 class FerrySailing(BaseModel):
     departure: datetime
@@ -61,6 +89,18 @@ class FerrySailing(BaseModel):
         return hash((self.departure, self.arrival, self.duration, self.notes))
 
 
+class ScheduleSource(BaseModel):
+    """HTTP validators and content hash of the page a schedule was parsed from.
+
+    Used to download the page again only if it changed, see `ScheduleDB.refresh_cache`.
+    """
+
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str
+    """Hash of the schedule elements of the page, see `ScheduleParser.get_content_hash`."""
+
+
 class FerrySchedule(BaseModel):
     date: datetime
     origin: LocationId
@@ -69,6 +109,177 @@ class FerrySchedule(BaseModel):
     url: str
     notes: tuple[str, ...] = ()
     """Notes or comments posted about this schedule."""
+    source: ScheduleSource | None = None
+
+
+class CompactSchedule:
+    """Memory and storage efficient form of a `FerrySchedule`, used everywhere except the API.
+
+    Sailing times are stored as arrays of minutes since midnight in wall-clock time, and the notes of the
+    sailings as indices into a table of distinct notes, with the note strings interned.
+    """
+
+    __slots__ = (
+        "arrivals",
+        "date",
+        "departures",
+        "destination",
+        "durations",
+        "notes",
+        "notes_table",
+        "origin",
+        "sailing_notes",
+        "source",
+        "url",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        date: datetime,
+        origin: LocationId,
+        destination: LocationId,
+        url: str,
+        notes: tuple[str, ...] = (),
+        source: ScheduleSource | None = None,
+        departures: "array[int]",
+        arrivals: "array[int]",
+        durations: "array[int]",
+        sailing_notes: "array[int]",
+        notes_table: tuple[tuple[str, ...], ...],
+    ) -> None:
+        self.date = date
+        self.origin = origin
+        self.destination = destination
+        self.url = url
+        self.notes = notes
+        """Notes or comments posted about this schedule."""
+        self.source = source
+        self.departures = departures
+        """Departure time of each sailing in minutes since midnight."""
+        self.arrivals = arrivals
+        """Arrival time of each sailing in minutes since midnight, less than the departure time if it is overnight."""
+        self.durations = durations
+        """Duration of each sailing in minutes."""
+        self.sailing_notes = sailing_notes
+        """Index of the notes of each sailing in `notes_table`."""
+        self.notes_table = notes_table
+        """Distinct notes of the sailings, the first entry is always empty."""
+
+    @classmethod
+    def from_schedule(cls, schedule: FerrySchedule, /) -> "CompactSchedule":
+        return cls.from_sailings(
+            schedule.sailings,
+            date=schedule.date,
+            origin=schedule.origin,
+            destination=schedule.destination,
+            url=schedule.url,
+            notes=schedule.notes,
+            source=schedule.source,
+        )
+
+    @classmethod
+    def from_sailings(  # noqa: PLR0913
+        cls,
+        sailings: Iterable[FerrySailing],
+        /,
+        *,
+        date: datetime,
+        origin: LocationId,
+        destination: LocationId,
+        url: str,
+        notes: Iterable[str] = (),
+        source: ScheduleSource | None = None,
+    ) -> "CompactSchedule":
+        notes_indices: dict[tuple[str, ...], int] = {(): 0}
+        departures, arrivals, durations, sailing_notes = array("H"), array("H"), array("H"), array("H")
+        for sailing in sailings:
+            departures.append(sailing.departure.hour * 60 + sailing.departure.minute)
+            arrivals.append(sailing.arrival.hour * 60 + sailing.arrival.minute)
+            durations.append(sailing.duration // 60)
+            sailing_notes.append(notes_indices.setdefault(sailing.notes, len(notes_indices)))
+        return cls(
+            date=date,
+            origin=origin,
+            destination=destination,
+            url=url,
+            notes=tuple(notes),
+            source=source,
+            departures=departures,
+            arrivals=arrivals,
+            durations=durations,
+            sailing_notes=sailing_notes,
+            notes_table=tuple(tuple(sys.intern(note) for note in x) for x in notes_indices),
+        )
+
+    def to_schedule(self) -> FerrySchedule:
+        day = self.date.date()
+        return FerrySchedule(
+            date=self.date,
+            origin=self.origin,
+            destination=self.destination,
+            sailings=tuple(
+                FerrySailing(
+                    departure=datetime.combine(day, time(departure // 60, departure % 60), tzinfo=CONFIG.timezone),
+                    arrival=datetime.combine(day, time(arrival // 60, arrival % 60), tzinfo=CONFIG.timezone),
+                    duration=duration * 60,
+                    notes=self.notes_table[notes_index],
+                )
+                for departure, arrival, duration, notes_index in zip(
+                    self.departures,
+                    self.arrivals,
+                    self.durations,
+                    self.sailing_notes,
+                    strict=True,
+                )
+            ),
+            url=self.url,
+            notes=self.notes,
+            source=self.source,
+        )
+
+    def dump_json(self) -> str:
+        return json.dumps(
+            {
+                "version": COMPACT_SCHEDULE_VERSION,
+                "date": self.date.isoformat(),
+                "origin": self.origin,
+                "destination": self.destination,
+                "url": self.url,
+                "notes": self.notes,
+                "source": self.source.model_dump(mode="json") if self.source else None,
+                "departures": self.departures.tolist(),
+                "arrivals": self.arrivals.tolist(),
+                "durations": self.durations.tolist(),
+                "sailing_notes": self.sailing_notes.tolist(),
+                "notes_table": self.notes_table,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def load_json(cls, data: str, /) -> "CompactSchedule":
+        """Load a schedule written by `dump_json`, or a serialized `FerrySchedule` written by earlier versions."""
+        obj = json.loads(data)
+        version = obj.get("version")
+        if version is None:
+            return cls.from_schedule(FerrySchedule.model_validate(obj))
+        if version != COMPACT_SCHEDULE_VERSION:
+            msg = f"unsupported compact schedule version {version}"
+            raise ValueError(msg)
+        return cls(
+            date=datetime.fromisoformat(obj["date"]),
+            origin=obj["origin"],
+            destination=obj["destination"],
+            url=obj["url"],
+            notes=tuple(obj["notes"]),
+            source=ScheduleSource.model_validate(obj["source"]) if obj["source"] else None,
+            departures=array("H", obj["departures"]),
+            arrivals=array("H", obj["arrivals"]),
+            durations=array("H", obj["durations"]),
+            sailing_notes=array("H", obj["sailing_notes"]),
+            notes_table=tuple(tuple(sys.intern(note) for note in x) for x in obj["notes_table"]),
+        )
 
 
 class ScheduleGetter(Protocol):
@@ -79,7 +290,76 @@ class ScheduleGetter(Protocol):
         /,
         *,
         date: datetime,
-    ) -> FerrySchedule | None: ...
+    ) -> CompactSchedule | None: ...
+
+
+class SailingTemplate(NamedTuple):
+    """A sailing row of a schedule page, before it is checked against its notes for a date."""
+
+    departure: time
+    arrival: time
+    duration: int
+    """Duration in seconds."""
+    notes: tuple[str, ...]
+
+
+class SailingCommentRule(NamedTuple):
+    """A sailing comment compiled by `ScheduleParser.compile_sailing_comment`, to check it against any date quickly."""
+
+    kind: Literal["only", "except", "excluded", "unknown"]
+    """Whether the sailing is available only on `dates`, on every date except `dates`, never, or always."""
+    dates: frozenset[tuple[int, int]] = frozenset()
+    """Month and day of the dates listed in the comment."""
+    checked_dates: tuple[tuple[int, int], ...] = ()
+    """`dates` in the order they are listed, if some of them do not exist in every year, such as Feb 29.
+
+    They are then checked in order, and `ValueError` is raised for the first one that does not exist in the year
+    of the date checked, unless the date was listed before it.
+    """
+
+    def matches(self, date: datetime, /) -> bool:
+        if not self.checked_dates:
+            return (date.month, date.day) in self.dates
+        return any(date.replace(month=month, day=day) == date for month, day in self.checked_dates)
+
+    def excludes(self, date: datetime, /) -> bool:
+        if self.kind == "only":
+            return not self.matches(date)
+        if self.kind == "except":
+            return self.matches(date)
+        return self.kind == "excluded"
+
+
+class SeasonalSchedule:
+    """Sailings of a seasonal schedule page for each weekday, from which the schedule of any date in its range is made.
+
+    Seasonal pages list the sailings of every weekday for a range of dates, with notes for the dates they are not
+    available on, so one download is enough for all the dates in the range.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        start: datetime,
+        end: datetime,
+        url: str,
+        weekdays: Sequence[Sequence[SailingTemplate]],
+        no_sailings_message: str,
+        source: ScheduleSource | None = None,
+    ) -> None:
+        self.start = start
+        """First date of the range."""
+        self.end = end
+        """Last date of the range, inclusive."""
+        self.url = url
+        self.weekdays = weekdays
+        """Sailings for each weekday, starting on Monday."""
+        self.no_sailings_message = no_sailings_message
+        self.source = source
+        """Source of the page, also the source of the schedules made from it."""
+
+    def covers(self, date: datetime, /) -> bool:
+        return self.start.date() <= date.date() <= self.end.date()
 
 
 class HtmlParseResult:
@@ -87,6 +367,8 @@ class HtmlParseResult:
     sailings: tuple[FerrySailing, ...] = ()
     notes: tuple[str, ...] = ()
     """Notes or comments posted about this schedule."""
+    seasonal: SeasonalSchedule | None = None
+    """Set for seasonal schedule pages, to make the schedules of the other dates in their range."""
 
     @classmethod
     def redirect(cls, redirect_url: str) -> "HtmlParseResult":
@@ -102,40 +384,131 @@ class HtmlParseResult:
         return result
 
 
+class ParsedSchedulePage(NamedTuple):
+    """Result of `parse_schedule_page`, with the sailings in compact form to be cheap to send between processes."""
+
+    content_hash: str
+    redirect_url: str = ""
+    schedule: CompactSchedule | None = None
+    """Schedule parsed from the page without its `source`.
+
+    None if the page redirects or its content hash is unchanged.
+    """
+    seasonal: SeasonalSchedule | None = None
+
+
 class ScheduleDownloadError(Exception):
     def __init__(self, msg: str, /, *args: Iterable, url: str) -> None:
+        self.msg = msg
         self.url = url
         super().__init__(f"error downloading schedule at {url}: {msg}", *args)
 
+    def __reduce__(self) -> tuple[Callable[..., "ScheduleDownloadError"], tuple]:
+        # Raised in parser processes and pickled to be raised again in the event loop, see `parse_schedule_page`.
+        return partial(self.__class__, self.msg, url=self.url), self.args[1:]
+
 
 class ScheduleParseError(Exception):
     def __init__(self, msg: str, /, *args: Iterable, url: str) -> None:
+        self.msg = msg
         self.url = url
         super().__init__(f"error parsing schedule at {url}: {msg}", *args)
 
+    def __reduce__(self) -> tuple[Callable[..., "ScheduleParseError"], tuple]:
+        # Raised in parser processes and pickled to be raised again in the event loop, see `parse_schedule_page`.
+        return partial(self.__class__, self.msg, url=self.url), self.args[1:]
+
+
+class UnavailableSchedule(BaseModel):
+    """A schedule that could not be downloaded or has not been posted yet, see `ScheduleDB.get_unavailable`."""
+
+    reason: UnavailableReason
+    retry_at: datetime
+    """Time after which the schedule is downloaded again."""
+    schedule: FerrySchedule | None = None
+    """Schedule without sailings saying that it has not been posted yet."""
+
+
+class ScheduleDBStats(BaseModel):
+    mem_cache: CacheStats
+    unavailable_cache: CacheStats
+    """Schedules that could not be downloaded or have not been posted yet."""
+    scraper: ScraperStats
+    downloads: int
+    """Schedule downloads started."""
+    coalesced_downloads: int
+    """Requests that waited for a download already in progress, or found its result, instead of starting their own."""
+    seasonal_schedules: int
+    """Schedules made from a seasonal schedule page downloaded for another date."""
+    revalidations: int
+    """Stored schedules downloaded again by the background refresh to check if their page changed."""
+    unchanged_revalidations: int
+    """Revalidations where the page was not modified or had the same content hash, so it was not parsed or saved."""
+
 
 class ScheduleDB:
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         ferry_connections: Iterable[FerryConnection],
         base_url: str | None = None,
         cache_dir: Path | None = None,
+        store: ScheduleStore | None = None,
+        client: ScraperClient | None = None,
         cache_ahead_days: int | None = None,
         refresh_interval: int | None = None,
+        mem_cache_size: int | None = None,
+        mem_cache_ttl: int | None = None,
+        io_threads: int | None = None,
+        parse_processes: int | None = None,
+        refresh_concurrency: int | None = None,
+        refresh_jitter: float | None = None,
+        refresh_revalidate: bool | None = None,
     ) -> None:
         self.ferry_connections = ferry_connections
         self.base_url = base_url or CONFIG.schedules.base_url
         self.cache_dir = cache_dir or CONFIG.schedules.cache_dir
         self.cache_ahead_days = cache_ahead_days or CONFIG.schedules.cache_ahead_days
         self.refresh_interval = refresh_interval or CONFIG.schedules.refresh_interval_seconds
-        self._refresh_thread = Thread(target=self._refresh_task, daemon=True)
-        self._mem_cache = {}
+        self.refresh_concurrency = refresh_concurrency or CONFIG.schedules.refresh_concurrency
+        self.refresh_jitter = CONFIG.schedules.refresh_jitter_seconds if refresh_jitter is None else refresh_jitter
+        self.refresh_revalidate = (
+            CONFIG.schedules.refresh_revalidate if refresh_revalidate is None else refresh_revalidate
+        )
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._mem_cache: LRUCache[ScheduleKey, CompactSchedule] = LRUCache(
+            max_size=mem_cache_size or CONFIG.schedules.mem_cache_size,
+            ttl=mem_cache_ttl or CONFIG.schedules.mem_cache_ttl_seconds,
+        )
         self.cache_dir.mkdir(mode=0o755, parents=True, exist_ok=True)
-        timeout = httpx.Timeout(30.0, pool=None)
-        limits = httpx.Limits(max_connections=5)
-        self._client = httpx.AsyncClient(timeout=timeout, limits=limits, follow_redirects=True)
+        unavailable_config = CONFIG.schedules.unavailable
+        self._unavailable_cache: LRUCache[ScheduleKey, UnavailableSchedule] = LRUCache(
+            max_size=unavailable_config.cache_size,
+        )
+        self._unavailable_ttls: dict[UnavailableReason, int] = {
+            "download_error": unavailable_config.download_error_ttl_seconds,
+            "parse_error": unavailable_config.parse_error_ttl_seconds,
+            "not_posted": unavailable_config.not_posted_ttl_seconds,
+        }
+        self._store = store or open_schedule_store(CONFIG.schedules.store, cache_dir=self.cache_dir)
+        # Reading, validating and writing stored schedules runs in threads to not block the event loop.
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=io_threads or CONFIG.schedules.io_threads,
+            thread_name_prefix="schedule-io",
+        )
+        self.parse_processes = CONFIG.schedules.parse_processes if parse_processes is None else parse_processes
+        self._parse_executor = self._create_parse_executor()
+        self._client = client or ScraperClient(CONFIG.schedules.scraper)
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._downloads: dict[ScheduleKey, asyncio.Task[CompactSchedule | None]] = {}
+        """Downloads in progress."""
+        self._downloads_count = 0
+        self._coalesced_downloads_count = 0
+        self._seasonal_schedules: dict[tuple[LocationId, LocationId], list[SeasonalSchedule]] = {}
+        """Seasonal schedule pages downloaded for each route, to make schedules for the dates they cover."""
+        self._seasonal_schedules_count = 0
+        self._revalidations_count = 0
+        self._unchanged_revalidations_count = 0
 
     def _get_download_url(
         self,
@@ -147,15 +520,15 @@ class ScheduleDB:
     ) -> str:
         return f"{self.base_url}{origin_id}-{destination_id}?&scheduleDate={date.strftime('%m/%d/%Y')}"
 
-    def _get_filepath(
+    def _get_key(
         self,
         origin_id: LocationId,
         destination_id: LocationId,
         /,
         *,
         date: datetime,
-    ) -> Path:
-        return self.cache_dir / f"{origin_id}-{destination_id}" / f"{date.date()}.json"
+    ) -> ScheduleKey:
+        return (origin_id, destination_id, date.date().isoformat())
 
     async def get(
         self,
@@ -164,31 +537,171 @@ class ScheduleDB:
         /,
         *,
         date: datetime,
-    ) -> FerrySchedule | None:
-        filepath = self._get_filepath(origin_id, destination_id, date=date)
-        schedule = self._mem_cache.get(filepath)
-        if schedule:
+    ) -> CompactSchedule | None:
+        key = self._get_key(origin_id, destination_id, date=date)
+        cached, schedule = self._get_cached(key)
+        if cached:
             return schedule
-        if filepath.exists():
-            schedule = FerrySchedule.model_validate_json(filepath.read_text(encoding="utf-8"))
-            self._mem_cache[filepath] = schedule
+        schedule = await self._run_io(partial(self._load, origin_id, destination_id, date=date))
+        if schedule is not None:
+            self._mem_cache.put(key, schedule)
             return schedule
-        schedule = await self.download_schedule(origin_id, destination_id, date=date)
-        if schedule:
-            self.put(schedule)
-        return schedule
+        return await self._download_once(origin_id, destination_id, date=date)
 
-    def put(self, schedule: FerrySchedule, /) -> None:
-        filepath = self._get_filepath(
-            schedule.origin,
-            schedule.destination,
-            date=schedule.date,
+    def _get_cached(self, key: ScheduleKey, /) -> tuple[bool, CompactSchedule | None]:
+        """Get a schedule from memory, or the schedule without sailings if it was recently found to be unavailable.
+
+        The first item is `False` if neither is in memory.
+        """
+        schedule = self._mem_cache.get(key)
+        if schedule is not None:
+            return True, schedule
+        unavailable = self._unavailable_cache.get(key)
+        if unavailable is not None:
+            return True, CompactSchedule.from_schedule(unavailable.schedule) if unavailable.schedule else None
+        return False, None
+
+    def get_unavailable(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> UnavailableSchedule | None:
+        """Return why a schedule is unavailable if it was recently found to be, without downloading it."""
+        return self._unavailable_cache.get(self._get_key(origin_id, destination_id, date=date))
+
+    def _put_unavailable(
+        self,
+        key: ScheduleKey,
+        reason: UnavailableReason,
+        schedule: CompactSchedule | None = None,
+        /,
+    ) -> None:
+        ttl = self._unavailable_ttls[reason]
+        retry_at = datetime.now(tz=CONFIG.timezone) + timedelta(seconds=ttl)
+        unavailable = UnavailableSchedule(
+            reason=reason,
+            retry_at=retry_at,
+            schedule=schedule.to_schedule() if schedule is not None else None,
         )
-        self._mem_cache[filepath] = schedule
-        dirpath = filepath.parent
-        if not dirpath.exists():
-            dirpath.mkdir(mode=0o755, parents=True, exist_ok=True)
-        filepath.write_text(schedule.model_dump_json(indent=4, exclude_none=True), encoding="utf-8")
+        self._unavailable_cache.put(key, unavailable, ttl=ttl)
+
+    async def _run_io(self, func: Callable[[], T], /) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, func)
+
+    def _create_parse_executor(self) -> ProcessPoolExecutor | None:
+        if not self.parse_processes:
+            return None
+        # Spawned instead of forked, forking a process that runs threads can deadlock the child.
+        return ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _parse_page(
+        self,
+        response: httpx.Response,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+        previous_hash: str | None,
+    ) -> ParsedSchedulePage:
+        # Only the page text goes to the parser process, the event loop keeps serving other requests meanwhile.
+        parse = partial(
+            parse_schedule_page,
+            response.text,
+            url=str(response.url),
+            date=date,
+            origin=origin_id,
+            destination=destination_id,
+            previous_hash=previous_hash,
+        )
+        executor = self._parse_executor
+        if executor is None:
+            return parse()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, parse)
+        except BrokenProcessPool as exc:
+            # A parser process died, for example killed for using too much memory. New ones parse the next pages.
+            if self._parse_executor is executor:
+                self._parse_executor = self._create_parse_executor()
+            msg = "parser process died"
+            raise ScheduleParseError(msg, url=str(response.url)) from exc
+
+    def _load(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule | None:
+        data = self._store.get(origin_id, destination_id, date=date)
+        if data is None:
+            return None
+        return CompactSchedule.load_json(data)
+
+    def _save(self, schedule: CompactSchedule, /) -> None:
+        self._store.put(schedule.origin, schedule.destination, date=schedule.date, data=schedule.dump_json())
+
+    async def _download_once(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule | None:
+        """Download and save a schedule, sharing one download between concurrent callers."""
+        key = self._get_key(origin_id, destination_id, date=date)
+        task = self._downloads.get(key)
+        if task is None:
+            # A download may have finished since the caller last checked, while it was loading from the store.
+            cached, schedule = self._get_cached(key)
+            if cached:
+                self._coalesced_downloads_count += 1
+                return schedule
+            task = asyncio.create_task(self._download_and_put(origin_id, destination_id, date=date))
+            self._downloads[key] = task
+            task.add_done_callback(lambda _: self._downloads.pop(key, None))
+            self._downloads_count += 1
+        else:
+            self._coalesced_downloads_count += 1
+        # Shielded so that a caller being cancelled does not cancel the download for the other callers.
+        return await asyncio.shield(task)
+
+    async def _download_and_put(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule | None:
+        key = self._get_key(origin_id, destination_id, date=date)
+        try:
+            schedule = await self._download_schedule_async(origin_id, destination_id, date=date)
+        except (ScheduleDownloadError, ScheduleParseError) as exc:
+            self._log_download_error(exc, origin_id, destination_id, date=date)
+            self._put_unavailable(key, "parse_error" if isinstance(exc, ScheduleParseError) else "download_error")
+            return None
+        if not schedule.departures and any(note in NO_SAILINGS_MESSAGES for note in schedule.notes):
+            # Not saved, so that the schedule is downloaded again once it is posted.
+            self._put_unavailable(key, "not_posted", schedule)
+            return schedule
+        self._unavailable_cache.discard(key)
+        self._mem_cache.put(key, schedule)
+        await self._run_io(partial(self._save, schedule))
+        return schedule
+
+    def put(self, schedule: FerrySchedule | CompactSchedule, /) -> None:
+        if isinstance(schedule, FerrySchedule):
+            schedule = CompactSchedule.from_schedule(schedule)
+        key = self._get_key(schedule.origin, schedule.destination, date=schedule.date)
+        self._unavailable_cache.discard(key)
+        self._mem_cache.put(key, schedule)
+        self._save(schedule)
 
     async def download_schedule(
         self,
@@ -197,135 +710,335 @@ class ScheduleDB:
         /,
         *,
         date: datetime,
-    ) -> FerrySchedule | None:
+    ) -> CompactSchedule | None:
         try:
             return await self._download_schedule_async(origin_id, destination_id, date=date)
         except (ScheduleDownloadError, ScheduleParseError) as exc:
-            msg = "failed to parse schedule" if isinstance(exc, ScheduleParseError) else "failed to download schedule"
-            self._logger.exception(
-                "%s %s-%s:%s from %s",
-                msg,
-                origin_id,
-                destination_id,
-                date.date(),
-                exc.url,
-            )
+            self._log_download_error(exc, origin_id, destination_id, date=date)
             return None
 
-    async def _download_schedule_async(
+    def _log_download_error(
         self,
+        exc: ScheduleDownloadError | ScheduleParseError,
         origin_id: LocationId,
         destination_id: LocationId,
         /,
         *,
         date: datetime,
-    ) -> FerrySchedule:
-        url = self._get_download_url(origin_id, destination_id, date=date)
+    ) -> None:
+        msg = "failed to parse schedule" if isinstance(exc, ScheduleParseError) else "failed to download schedule"
+        self._logger.exception(
+            "%s %s-%s:%s from %s",
+            msg,
+            origin_id,
+            destination_id,
+            date.date(),
+            exc.url,
+        )
+
+    async def _download_schedule_async(  # noqa: C901
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+        previous: CompactSchedule | None = None,
+    ) -> CompactSchedule:
+        """Download and parse a schedule.
+
+        If `previous` is given, its page is requested again with conditional headers, and `previous` itself is
+        returned if the page was not modified or its schedule elements have the same content hash.
+        """
+        if previous is None:
+            seasonal_schedule = self._get_seasonal_schedule(origin_id, destination_id, date=date)
+            if seasonal_schedule is not None:
+                self._seasonal_schedules_count += 1
+                return self._make_seasonal_schedule(seasonal_schedule, origin_id, destination_id, date=date)
+        url = previous.url if previous else self._get_download_url(origin_id, destination_id, date=date)
         route = f"{origin_id}-{destination_id}"
         self._logger.info("fetching schedule: %s:%s", route, date.date())
         max_redirects_count = 3
         redirects = []
         while True:
+            source = previous.source if previous and url == previous.url else None
             try:
-                response = await self._client.get(url)
+                response = await self._client.get(url, headers=self._get_conditional_headers(source))
             except httpx.HTTPError as exc:
                 msg = "failed to download schedule"
                 raise ScheduleDownloadError(msg, url=url) from exc
+            if previous and source and response.status_code == httpx.codes.NOT_MODIFIED:
+                return previous
             if not httpx.codes.is_success(response.status_code):
                 msg = f"status {response.status_code}"
                 raise ScheduleDownloadError(msg, url=url)
             self._logger.info("fetched schedule: %s:%s", route, date.date())
-            schedule_parser = ScheduleParser()
-            result = schedule_parser.parse_schedule_html(response, date)
-            if result.redirect_url:
+            page = await self._parse_page(
+                response,
+                origin_id,
+                destination_id,
+                date=date,
+                previous_hash=source.content_hash if previous and source else None,
+            )
+            if previous and source and page.content_hash == source.content_hash:
+                return previous
+            if page.redirect_url:
                 if len(redirects) > max_redirects_count:
                     msg = "too many redirects"
                     raise ScheduleDownloadError(msg, url=url)
                 if url in redirects:
                     msg = "redirects loop"
                     raise ScheduleDownloadError(msg, url=url)
-                url = result.redirect_url
+                url = page.redirect_url
                 redirects.append(url)
                 continue
-            return FerrySchedule(
-                date=date,
-                origin=origin_id,
-                destination=destination_id,
-                sailings=tuple(result.sailings),
-                url=url,
-                notes=result.notes,
+            if page.schedule is None:
+                msg = "no schedule parsed from page"
+                raise ScheduleParseError(msg, url=url)
+            page.schedule.source = ScheduleSource(
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                content_hash=page.content_hash,
             )
+            if page.seasonal:
+                page.seasonal.source = page.schedule.source
+                self._add_seasonal_schedule(origin_id, destination_id, page.seasonal)
+            return page.schedule
+
+    def _get_conditional_headers(self, source: ScheduleSource | None, /) -> dict[str, str]:
+        headers = {}
+        if source and source.etag:
+            headers["If-None-Match"] = source.etag
+        if source and source.last_modified:
+            headers["If-Modified-Since"] = source.last_modified
+        return headers
 
-    async def _download_and_save_schedule(
+    async def _revalidate(
         self,
         origin_id: LocationId,
         destination_id: LocationId,
         /,
         *,
         date: datetime,
+        checked_sources: dict[str, ScheduleSource],
     ) -> bool:
-        schedule = await self.download_schedule(
-            origin_id,
-            destination_id,
+        """Download a stored schedule again and save it if its page changed, return whether it did.
+
+        `checked_sources` has the current source of the pages already downloaded again in this refresh, by URL.
+        Schedules made from one seasonal page are checked with a single request: the other dates are unchanged
+        if their source is current, or made again from the new seasonal schedule if it is not.
+        """
+        previous = await self._run_io(partial(self._load, origin_id, destination_id, date=date))
+        if previous is None:
+            return False
+        self._revalidations_count += 1
+        checked_source = checked_sources.get(previous.url)
+        seasonal_schedule = self._get_seasonal_schedule(origin_id, destination_id, date=date)
+        if checked_source is not None and checked_source == previous.source:
+            schedule = previous
+        elif (
+            checked_source is not None
+            and seasonal_schedule is not None
+            and seasonal_schedule.url == previous.url
+            and seasonal_schedule.source == checked_source
+        ):
+            schedule = self._make_seasonal_schedule(seasonal_schedule, origin_id, destination_id, date=date)
+        else:
+            try:
+                schedule = await self._download_schedule_async(
+                    origin_id,
+                    destination_id,
+                    date=date,
+                    previous=previous,
+                )
+            except (ScheduleDownloadError, ScheduleParseError) as exc:
+                # The stored schedule is kept, it is checked again on the next refresh.
+                self._log_download_error(exc, origin_id, destination_id, date=date)
+                return False
+            if schedule.source is not None:
+                checked_sources[schedule.url] = schedule.source
+        if schedule is previous:
+            self._unchanged_revalidations_count += 1
+            return False
+        if not schedule.departures and any(note in NO_SAILINGS_MESSAGES for note in schedule.notes):
+            return False
+        self._mem_cache.put(self._get_key(origin_id, destination_id, date=date), schedule)
+        await self._run_io(partial(self._save, schedule))
+        return True
+
+    def _get_seasonal_schedule(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> SeasonalSchedule | None:
+        for seasonal_schedule in self._seasonal_schedules.get((origin_id, destination_id), ()):
+            if seasonal_schedule.covers(date):
+                return seasonal_schedule
+        return None
+
+    def _add_seasonal_schedule(
+        self,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        seasonal_schedule: SeasonalSchedule,
+        /,
+    ) -> None:
+        today = datetime.now(tz=CONFIG.timezone).date()
+        seasonal_schedules = [
+            x
+            for x in self._seasonal_schedules.get((origin_id, destination_id), ())
+            if x.end.date() >= today and not (x.start == seasonal_schedule.start and x.end == seasonal_schedule.end)
+        ]
+        seasonal_schedules.append(seasonal_schedule)
+        self._seasonal_schedules[(origin_id, destination_id)] = seasonal_schedules
+
+    def _make_seasonal_schedule(
+        self,
+        seasonal_schedule: SeasonalSchedule,
+        origin_id: LocationId,
+        destination_id: LocationId,
+        /,
+        *,
+        date: datetime,
+    ) -> CompactSchedule:
+        result = ScheduleParser().make_result(
+            seasonal_schedule.weekdays[date.weekday()],
+            date,
+            url=seasonal_schedule.url,
+            no_sailings_message=seasonal_schedule.no_sailings_message,
+        )
+        return CompactSchedule.from_sailings(
+            result.sailings,
             date=date,
+            origin=origin_id,
+            destination=destination_id,
+            url=seasonal_schedule.url,
+            notes=result.notes,
+            source=seasonal_schedule.source,
         )
-        if schedule is not None:
-            self.put(schedule)
-            return True
-        return False
 
     async def refresh_cache(self) -> None:
         current_date = datetime.now(tz=CONFIG.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
         dates = [current_date + timedelta(days=i) for i in range(self.cache_ahead_days)]
-        for subdir, _, filenames in os.walk(self.cache_dir):
-            for filename in filenames:
-                date = datetime.fromisoformat(".".join(filename.split(".")[:-1]))
-                if date != current_date and date not in dates:
-                    (Path(subdir) / filename).unlink(missing_ok=True)
-        # clear memory cache
-        self._mem_cache = {}
-        # download new schedules
-        tasks = []
-        for connection in self.ferry_connections:
-            for date in dates:
-                filepath = self._get_filepath(
-                    connection.origin.id,
-                    connection.destination.id,
-                    date=date,
-                )
-                if not filepath.exists():
-                    tasks.append(
-                        asyncio.create_task(
-                            self._download_and_save_schedule(
-                                connection.origin.id,
-                                connection.destination.id,
-                                date=date,
-                            ),
-                        ),
+        expired_schedules = await self._run_io(
+            partial(self._store.expire, start=current_date, end=current_date + timedelta(days=len(dates))),
+        )
+        self._logger.info("deleted %d expired schedules", expired_schedules)
+        # Schedules in memory are kept, they expire one at a time after the cache TTL.
+
+        def get_schedules() -> list[tuple[FerryConnection, datetime, bool]]:
+            # Soonest dates first, they are the most likely to be requested.
+            return [
+                (connection, date, self._store.contains(connection.origin.id, connection.destination.id, date=date))
+                for date in dates
+                for connection in self.ferry_connections
+            ]
+
+        schedules = iter(await self._run_io(get_schedules))
+        checked_sources: dict[str, ScheduleSource] = {}
+
+        async def refresh_schedules() -> tuple[int, int]:
+            downloaded = changed = 0
+            # The iterator is shared by all workers, so each schedule is downloaded by only one of them.
+            for connection, date, stored in schedules:
+                origin_id, destination_id = connection.origin.id, connection.destination.id
+                if stored and not self.refresh_revalidate:
+                    continue
+                if not stored and self.get_unavailable(origin_id, destination_id, date=date):
+                    continue
+                # Spread the downloads over time instead of sending them in bursts.
+                await asyncio.sleep(random.uniform(0, self.refresh_jitter))  # noqa: S311
+                if stored:
+                    changed += await self._revalidate(
+                        origin_id,
+                        destination_id,
+                        date=date,
+                        checked_sources=checked_sources,
                     )
-        downloaded_schedules = sum(await asyncio.gather(*tasks))
-        self._logger.info("finished refreshing cache, downloaded %d schedules", downloaded_schedules)
+                    continue
+                # Shares the download with user requests for the same schedule.
+                schedule = await self._download_once(origin_id, destination_id, date=date)
+                downloaded += schedule is not None
+            return downloaded, changed
 
-    def start_refresh_thread(self) -> None:
-        # Disabled temporarily due to causing too many issues.
-        if False:
-            self._refresh_thread.start()
+        results = await asyncio.gather(*(refresh_schedules() for _ in range(self.refresh_concurrency)))
+        self._logger.info(
+            "finished refreshing cache, downloaded %d schedules, %d stored schedules changed",
+            sum(downloaded for downloaded, _ in results),
+            sum(changed for _, changed in results),
+        )
+
+    def stats(self) -> ScheduleDBStats:
+        return ScheduleDBStats(
+            mem_cache=self._mem_cache.stats(),
+            unavailable_cache=self._unavailable_cache.stats(),
+            scraper=self._client.stats(),
+            downloads=self._downloads_count,
+            coalesced_downloads=self._coalesced_downloads_count,
+            seasonal_schedules=self._seasonal_schedules_count,
+            revalidations=self._revalidations_count,
+            unchanged_revalidations=self._unchanged_revalidations_count,
+        )
+
+    async def close(self) -> None:
+        await self.stop_refresh()
+        downloads = list(self._downloads.values())
+        for task in downloads:
+            task.cancel()
+        await asyncio.gather(*downloads, return_exceptions=True)
+        await self._client.aclose()
+        self._io_executor.shutdown()
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(cancel_futures=True)
+        self._store.close()
 
-    def _refresh_task(self) -> None:
+    def start_refresh(self) -> None:
+        """Download missing schedules for the next `cache_ahead_days` days now and every `refresh_interval` seconds.
+
+        Runs as a task on the running event loop, stop it with `stop_refresh`.
+        """
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
         while True:
-            asyncio.run(self.refresh_cache())
-            time.sleep(self.refresh_interval)
+            try:
+                await self.refresh_cache()
+            except Exception:
+                self._logger.exception("failed to refresh schedule cache")
+            await asyncio.sleep(self.refresh_interval)
 
 
 class ScheduleParser:
-    def __init__(self) -> None:
+    comment_rules: ClassVar[LRUCache[str, SailingCommentRule]] = LRUCache(max_size=COMMENT_RULES_CACHE_SIZE)
+    """Compiled sailing comments shared by all parsers, the same comments appear on many pages."""
+
+    def __init__(self, *, extract_elements: bool = True) -> None:
+        self.extract_elements = extract_elements
+        """Parse only the schedule elements of a page instead of the whole page, see `get_schedule_elements`."""
         self._logger = logging.getLogger(self.__class__.__name__)
 
     def parse_schedule_html(self, response: httpx.Response, date: datetime) -> HtmlParseResult:
-        html = response.text.replace("\u2060", "")
-        soup = BeautifulSoup(markup=html, features="html.parser")
+        return self.parse_html(response.text, str(response.url), date)
+
+    def parse_html(self, html: str, url: str, date: datetime) -> HtmlParseResult:
+        html = html.replace("\u2060", "")
+        markup = "".join(self.get_schedule_elements(html)) if self.extract_elements else html
+        soup = BeautifulSoup(markup=markup, features="html.parser")
         table_tag = soup.find("table", id="dailyScheduleTableOnward")
         daterange_tag = soup.find("div", id="dateRangeModal")  # for seasonal
+        no_sailings_message = self.get_no_sailings_message(html)
+        seasonal = None
         rows = []
         if table_tag and table_tag.tbody:
             rows = table_tag.tbody.find_all("tr")
@@ -335,33 +1048,140 @@ class ScheduleParser:
                 index = self.get_seasonal_schedule_daterange_index(hrefs, date)
             except Exception as exc:
                 msg = "failed to parse seasonal schedule daterange"
-                raise ScheduleParseError(msg, url=str(response.url)) from exc
+                raise ScheduleParseError(msg, url=url) from exc
             if index < 0:
                 msg = f"date {date} is out of seasonal schedules range"
-                raise ScheduleParseError(msg, url=str(response.url))
-            url = f"{response.url.scheme}://{response.url.host}{hrefs[index]}"
-            if index > 0 and url != str(response.url):
-                return HtmlParseResult.redirect(url)
-            rows = self.get_seasonal_schedule_rows(str(response.url), soup, date)
+                raise ScheduleParseError(msg, url=url)
+            redirect_url = str(httpx.URL(url).join(hrefs[index]))
+            if index > 0 and redirect_url != url:
+                return HtmlParseResult.redirect(redirect_url)
+            seasonal = self.parse_seasonal_schedule(
+                url,
+                soup,
+                hrefs[index],
+                no_sailings_message=no_sailings_message,
+            )
         try:
-            sailings = self.parse_sailings_from_html_rows(rows, date)
+            templates = seasonal.weekdays[date.weekday()] if seasonal else self.parse_sailing_templates(rows)
         except Exception as exc:
             msg = "failed to parse schedule from HTML rows"
-            raise ScheduleParseError(msg, url=str(response.url)) from exc
+            raise ScheduleParseError(msg, url=url) from exc
+        result = self.make_result(templates, date, url=url, no_sailings_message=no_sailings_message)
+        result.seasonal = seasonal
+        return result
+
+    def parse_seasonal_schedule(
+        self,
+        url: str,
+        soup: BeautifulSoup,
+        href: str,
+        /,
+        *,
+        no_sailings_message: str,
+    ) -> SeasonalSchedule:
+        daterange = self.get_seasonal_schedule_daterange_from_url(href)
+        if daterange is None:
+            msg = f"no seasonal schedule daterange in {href!r}"
+            raise ScheduleParseError(msg, url=url)
+        try:
+            weekdays = [
+                self.parse_sailing_templates(self.get_seasonal_schedule_weekday_rows(url, soup, weekday))
+                for weekday in range(len(WEEKDAY_NAMES))
+            ]
+        except ScheduleParseError:
+            raise
+        except Exception as exc:
+            msg = "failed to parse schedule from HTML rows"
+            raise ScheduleParseError(msg, url=url) from exc
+        return SeasonalSchedule(
+            start=daterange[0],
+            end=daterange[1],
+            url=url,
+            weekdays=weekdays,
+            no_sailings_message=no_sailings_message,
+        )
+
+    def make_result(
+        self,
+        templates: Iterable[SailingTemplate],
+        date: datetime,
+        /,
+        *,
+        url: str,
+        no_sailings_message: str,
+    ) -> HtmlParseResult:
+        try:
+            sailings = self.make_sailings(templates, date)
+        except Exception as exc:
+            msg = "failed to parse schedule from HTML rows"
+            raise ScheduleParseError(msg, url=url) from exc
         notes = []
         if not sailings:
-            err = "No sailings found"
-            for msg in NO_SAILINGS_MESSAGES:
-                if msg in html:
-                    err = msg
-                    break
-            notes.append(err)
-            self._logger.warning("%s at %s", err, response.url)
+            notes.append(no_sailings_message)
+            self._logger.warning("%s at %s", no_sailings_message, url)
         return HtmlParseResult.from_sailings(sailings, notes)
 
+    def get_content_hash(self, html: str) -> str:
+        """Return a hash of the elements of a schedule page that schedules are parsed from.
+
+        The rest of the page can change on every request, so it is not included. Whitespace is normalized.
+        """
+        html = html.replace("\u2060", "")
+        content = hashlib.sha256()
+        for element in self.get_schedule_elements(html):
+            content.update(" ".join(element.split()).encode())
+        for msg in NO_SAILINGS_MESSAGES:
+            if msg in html:
+                content.update(msg.encode())
+        return content.hexdigest()
+
+    def get_schedule_elements(self, html: str) -> list[str]:
+        """Return the HTML of the elements of a schedule page that schedules are parsed from, in document order.
+
+        The elements are found by searching the text for their ids and the matching closing tags,
+        which is much faster than parsing the whole page, most of which is not part of the schedule.
+        """
+        elements = []
+        end = 0
+        for match in SCHEDULE_ELEMENT_PATTERN.finditer(html):
+            if match.start() < end:
+                # Nested in the previous element, which already includes it.
+                continue
+            tag_pattern = re.compile(rf"<(/?){match[1]}\b", re.IGNORECASE)
+            depth = 0
+            end = len(html)
+            for tag_match in tag_pattern.finditer(html, match.start()):
+                depth += -1 if tag_match[1] else 1
+                if depth == 0:
+                    end = html.find(">", tag_match.end()) + 1 or len(html)
+                    break
+            elements.append(html[match.start() : end])
+        return elements
+
+    def get_no_sailings_message(self, html: str) -> str:
+        for msg in NO_SAILINGS_MESSAGES:
+            if msg in html:
+                return msg
+        return "No sailings found"
+
     def parse_sailings_from_html_rows(self, rows: Iterable[Tag], date: datetime) -> Sequence[FerrySailing]:
+        return self.make_sailings(self.parse_sailing_templates(rows), date)
+
+    def make_sailings(self, templates: Iterable[SailingTemplate], date: datetime) -> Sequence[FerrySailing]:
+        return [
+            FerrySailing(
+                departure=datetime.combine(date.date(), template.departure, tzinfo=CONFIG.timezone),
+                arrival=datetime.combine(date.date(), template.arrival, tzinfo=CONFIG.timezone),
+                duration=template.duration,
+                notes=template.notes,
+            )
+            for template in templates
+            if not any(self.is_sailing_excluded_on_date(note, date) for note in template.notes)
+        ]
+
+    def parse_sailing_templates(self, rows: Iterable[Tag]) -> list[SailingTemplate]:
         sailing_row_min_td_count = 3
-        sailings = []
+        templates = []
         for row in rows:
             tds = row.find_all("td")
             if (
@@ -372,20 +1192,13 @@ class ScheduleParser:
                 continue
             td1 = tds[1].text.strip().split("\n", maxsplit=1)
             departure_time, comments = td1 if len(td1) > 1 else (td1[0], "")
-            if comments:
-                notes = self.parse_sailing_comments(comments)
-                if any(self.is_sailing_excluded_on_date(note, date) for note in notes):
-                    continue
-            else:
-                notes = []
-            departure = datetime.strptime(
-                departure_time.strip(),
-                "%I:%M %p",
-            ).replace(year=date.year, month=date.month, day=date.day, tzinfo=CONFIG.timezone)
-            arrival = datetime.strptime(
-                row.find_all("td")[2].text.strip(),
-                "%I:%M %p",
-            ).replace(year=date.year, month=date.month, day=date.day, tzinfo=CONFIG.timezone)
+            notes = self.parse_sailing_comments(comments) if comments else []
+            departure = datetime.strptime(departure_time.strip(), "%I:%M %p").replace(tzinfo=CONFIG.timezone).time()
+            arrival = (
+                datetime.strptime(row.find_all("td")[2].text.strip(), "%I:%M %p")
+                .replace(tzinfo=CONFIG.timezone)
+                .time()
+            )
             td3 = tds[3].text.strip()
             if "h " in td3 and "m" in td3:
                 td3format = "%Hh %Mm"
@@ -403,14 +1216,10 @@ class ScheduleParser:
                     ).replace(tzinfo=CONFIG.timezone),
                 ).total_seconds(),
             )
-            sailing = FerrySailing(
-                departure=departure,
-                arrival=arrival,
-                duration=duration,
-                notes=tuple(notes),
+            templates.append(
+                SailingTemplate(departure=departure, arrival=arrival, duration=duration, notes=tuple(notes)),
             )
-            sailings.append(sailing)
-        return sailings
+        return templates
 
     def parse_sailing_comments(self, comments: str) -> list[str]:
         comments = comments.strip()
@@ -421,12 +1230,15 @@ class ScheduleParser:
         return [note.strip() for note in notes if note]
 
     def get_seasonal_schedule_rows(self, url: str, soup: BeautifulSoup, date: datetime) -> Sequence[Tag]:
+        return self.get_seasonal_schedule_weekday_rows(url, soup, date.weekday())
+
+    def get_seasonal_schedule_weekday_rows(self, url: str, soup: BeautifulSoup, weekday_index: int) -> Sequence[Tag]:
         rows = []
         form = soup.find("form", id="seasonalSchedulesForm")
         if form is None:
             msg = "'seasonalSchedulesForm' not found"
             raise ScheduleParseError(msg, url=url)
-        weekday = WEEKDAY_NAMES[date.weekday()]
+        weekday = WEEKDAY_NAMES[weekday_index]
         for thead in form.find_all("thead"):
             if thead.get_text().lower().strip().startswith(weekday):
                 rows = [
@@ -459,17 +1271,38 @@ class ScheduleParser:
     def is_sailing_excluded_on_date(self, schedule_comment: str, date: datetime) -> bool:
         if not schedule_comment:
             return False
-        schedule_comment = schedule_comment.strip()
-        if schedule_comment.upper() == "FOOT PASSENGERS ONLY":
-            return True
-        if schedule_comment.upper().startswith("ONLY"):
-            return not self.match_specific_sailing_date(schedule_comment, date)
-        if schedule_comment.upper().startswith(("EXCEPT", "NOT AVAILABLE")):
-            return self.match_specific_sailing_date(schedule_comment, date)
-        self._logger.warning("unknown sailing comment: %r", schedule_comment)
-        return False
+        return self.compile_sailing_comment(schedule_comment).excludes(date)
 
     def match_specific_sailing_date(self, schedule_dates: str, date: datetime) -> bool:
+        return SailingCommentRule("only", *self.parse_sailing_dates(schedule_dates)).matches(date)
+
+    def compile_sailing_comment(self, schedule_comment: str) -> SailingCommentRule:
+        rule = self.comment_rules.get(schedule_comment)
+        if rule is None:
+            rule = self._compile_sailing_comment(schedule_comment)
+            self.comment_rules.put(schedule_comment, rule)
+        return rule
+
+    def _compile_sailing_comment(self, schedule_comment: str) -> SailingCommentRule:
+        comment = schedule_comment.strip().upper()
+        if comment == "FOOT PASSENGERS ONLY":
+            return SailingCommentRule("excluded")
+        if comment.startswith("ONLY"):
+            return SailingCommentRule("only", *self.parse_sailing_dates(schedule_comment))
+        if comment.startswith(("EXCEPT", "NOT AVAILABLE")):
+            return SailingCommentRule("except", *self.parse_sailing_dates(schedule_comment))
+        self._logger.warning("unknown sailing comment: %r", schedule_comment.strip())
+        return SailingCommentRule("unknown")
+
+    def parse_sailing_dates(
+        self,
+        schedule_dates: str,
+    ) -> tuple[frozenset[tuple[int, int]], tuple[tuple[int, int], ...]]:
+        """Return the month and day of the dates listed in a sailing comment, see `SailingCommentRule`.
+
+        The dates after a word that is not understood are ignored.
+        """
+        dates = []
         month: int | None = None
         schedule_dates = schedule_dates.upper()
         for c in [".", "&", " ON ", " ON:"]:
@@ -487,30 +1320,62 @@ class ScheduleParser:
                         token,
                         schedule_dates,
                     )
-                    return False
-                _date = datetime(year=date.year, month=month, day=int(token), tzinfo=CONFIG.timezone)
-            else:
-                dt = token.split(" ")
-                expected_tokens_count = 2
-                if len(dt) == expected_tokens_count and dt[0].isnumeric() and dt[1] in MONTHS:
-                    # 01 JAN, 02 JAN, 05 FEB, 06 FEB
-                    _date = datetime(
-                        year=date.year,
-                        month=MONTHS.index(dt[1]) + 1,
-                        day=int(dt[0]),
-                        tzinfo=CONFIG.timezone,
-                    )
-                elif len(dt) == expected_tokens_count and dt[1].isnumeric() and dt[0] in MONTHS:
-                    # Jan 1, 2, Feb 5 & 6
-                    month = MONTHS.index(dt[0]) + 1
-                    _date = datetime(year=date.year, month=month, day=int(dt[1]), tzinfo=CONFIG.timezone)
-                else:
-                    self._logger.warning(
-                        "failed to parse schedule dates: Unknown word %r in %r",
-                        token,
-                        schedule_dates,
-                    )
                     break
-            if date.month == _date.month and date.day == _date.day:
-                return True
-        return False
+                dates.append((month, self._parse_day(token)))
+                continue
+            dt = token.split(" ")
+            expected_tokens_count = 2
+            if len(dt) == expected_tokens_count and dt[0].isnumeric() and dt[1] in MONTHS:
+                # 01 JAN, 02 JAN, 05 FEB, 06 FEB
+                dates.append((MONTHS.index(dt[1]) + 1, self._parse_day(dt[0])))
+            elif len(dt) == expected_tokens_count and dt[1].isnumeric() and dt[0] in MONTHS:
+                # Jan 1, 2, Feb 5 & 6
+                month = MONTHS.index(dt[0]) + 1
+                dates.append((month, self._parse_day(dt[1])))
+            else:
+                self._logger.warning(
+                    "failed to parse schedule dates: Unknown word %r in %r",
+                    token,
+                    schedule_dates,
+                )
+                break
+        # 2001 is not a leap year, so a date that exists in it exists in every year.
+        if all(1 <= day <= calendar.monthrange(2001, month)[1] for month, day in dates):
+            return frozenset(dates), ()
+        return frozenset(dates), tuple(dates)
+
+    def _parse_day(self, token: str) -> int:
+        # Some numeric characters such as fractions are not decimal digits, they make a day that does not exist.
+        return int(token) if token.isdecimal() else 0
+
+
+def parse_schedule_page(  # noqa: PLR0913
+    html: str,
+    /,
+    *,
+    url: str,
+    date: datetime,
+    origin: LocationId,
+    destination: LocationId,
+    previous_hash: str | None = None,
+) -> ParsedSchedulePage:
+    """Parse a downloaded schedule page, in a parser process of `ScheduleDB`.
+
+    The page is not parsed if its content hash is `previous_hash`.
+    """
+    schedule_parser = ScheduleParser()
+    content_hash = schedule_parser.get_content_hash(html)
+    if content_hash == previous_hash:
+        return ParsedSchedulePage(content_hash)
+    result = schedule_parser.parse_html(html, url, date)
+    if result.redirect_url:
+        return ParsedSchedulePage(content_hash, redirect_url=result.redirect_url)
+    schedule = CompactSchedule.from_sailings(
+        result.sailings,
+        date=date,
+        origin=origin,
+        destination=destination,
+        url=url,
+        notes=result.notes,
+    )
+    return ParsedSchedulePage(content_hash, schedule=schedule, seasonal=result.seasonal)
@@ -0,0 +1,140 @@
+"""Persistent storage of downloaded schedules, used by `ScheduleDB`.
+
+Schedules are stored as serialized JSON text, keyed by origin, destination and date.
+`JsonScheduleStore` keeps one file per route per day, and `SqliteScheduleStore` keeps every
+schedule in a single SQLite database in WAL mode, which can be shared by several worker processes.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Protocol
+
+if TYPE_CHECKING:
+    from ferry_planner.location import LocationId
+
+ScheduleStoreType = Literal["json", "sqlite"]
+SQLITE_FILENAME = "schedules.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduleStore(Protocol):
+    def get(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> str | None: ...
+
+    def put(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime, data: str) -> None: ...
+
+    def contains(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> bool: ...
+
+    def expire(self, *, start: datetime, end: datetime) -> int:
+        """Delete the schedules for dates before `start` or on or after `end`, and return how many were deleted."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class JsonScheduleStore:
+    def __init__(self, cache_dir: Path, /) -> None:
+        self.cache_dir = cache_dir
+
+    def _get_filepath(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> Path:
+        return self.cache_dir / f"{origin_id}-{destination_id}" / f"{date.date()}.json"
+
+    def get(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> str | None:
+        try:
+            return self._get_filepath(origin_id, destination_id, date=date).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime, data: str) -> None:
+        filepath = self._get_filepath(origin_id, destination_id, date=date)
+        filepath.parent.mkdir(mode=0o755, parents=True, exist_ok=True)
+        # Written to a temporary file first, so that readers never see a partially written file.
+        tmp_path = filepath.with_name(f"{filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.replace(filepath)
+
+    def contains(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> bool:
+        return self._get_filepath(origin_id, destination_id, date=date).exists()
+
+    def expire(self, *, start: datetime, end: datetime) -> int:
+        deleted = 0
+        for subdir, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                stem, _, extension = filename.rpartition(".")
+                if extension != "json":
+                    continue
+                date = datetime.fromisoformat(stem).date()
+                if date < start.date() or date >= end.date():
+                    (Path(subdir) / filename).unlink(missing_ok=True)
+                    deleted += 1
+        return deleted
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteScheduleStore:
+    def __init__(self, path: Path, /) -> None:
+        self.path = path
+        # The connection is shared by the threads of this process, other processes open their own.
+        # WAL mode lets them read while another process writes.
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS schedules ("
+                "origin TEXT NOT NULL, destination TEXT NOT NULL, date TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (origin, destination, date)) WITHOUT ROWID",
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS schedules_date ON schedules (date)")
+
+    def get(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> str | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM schedules WHERE origin = ? AND destination = ? AND date = ?",
+                (origin_id, destination_id, date.date().isoformat()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime, data: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO schedules (origin, destination, date, data) VALUES (?, ?, ?, ?)",
+                (origin_id, destination_id, date.date().isoformat(), data),
+            )
+
+    def contains(self, origin_id: LocationId, destination_id: LocationId, /, *, date: datetime) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM schedules WHERE origin = ? AND destination = ? AND date = ?",
+                (origin_id, destination_id, date.date().isoformat()),
+            ).fetchone()
+        return row is not None
+
+    def expire(self, *, start: datetime, end: datetime) -> int:
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM schedules WHERE date < ? OR date >= ?",
+                (start.date().isoformat(), end.date().isoformat()),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def open_schedule_store(store_type: ScheduleStoreType, /, *, cache_dir: Path) -> ScheduleStore:
+    if store_type == "sqlite":
+        path = cache_dir / SQLITE_FILENAME
+        logger.info("using SQLite schedule store '%s'", path)
+        return SqliteScheduleStore(path)
+    return JsonScheduleStore(cache_dir)
@@ -0,0 +1,192 @@
+"""HTTP client used to download schedule pages, see `ScheduleDB`.
+
+Requests are spread out with a token bucket, retried with jittered exponential backoff when they fail with
+a transient error, and limited to a number of concurrent requests that adapts to the upstream site:
+it grows by one for every window of fast successful responses and shrinks by a factor on slow responses and errors
+(additive increase, multiplicative decrease).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    from ferry_planner.config import ScraperConfig
+
+RETRYABLE_STATUS_CODES = frozenset(
+    (
+        httpx.codes.TOO_MANY_REQUESTS,
+        httpx.codes.INTERNAL_SERVER_ERROR,
+        httpx.codes.BAD_GATEWAY,
+        httpx.codes.SERVICE_UNAVAILABLE,
+        httpx.codes.GATEWAY_TIMEOUT,
+    ),
+)
+
+
+class ScraperStats(BaseModel):
+    requests: int
+    """Requests sent, including retries."""
+    retries: int
+    failures: int
+    """Requests that still failed after all retries."""
+    throttled: int
+    """Responses with status 429 Too Many Requests."""
+    rate_limit_wait: float
+    """Total seconds that requests waited for the rate limit."""
+    concurrency_limit: float
+    in_flight: int
+    mean_latency: float
+    """Mean seconds taken by a request."""
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, and up to `burst` at once after being idle."""
+
+    def __init__(self, *, rate: float, burst: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return how many seconds were spent waiting."""
+        start = self._clock()
+        # Waiters are served in order by the lock.
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """Limit the number of concurrent requests to a limit that adapts to their latency and errors.
+
+    The limit grows by one after about `limit` successful responses faster than `target_latency`,
+    and is multiplied by `decrease_factor` after a slower response or an error.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        decrease_factor: float,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, *, latency: float, success: bool) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            if success and latency <= self.target_latency:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._condition.notify_all()
+
+
+class ScraperClient:
+    def __init__(self, config: ScraperConfig, /) -> None:
+        self.config = config
+        timeout = httpx.Timeout(config.timeout_seconds, pool=None)
+        limits = httpx.Limits(max_connections=config.max_concurrency)
+        self._client = httpx.AsyncClient(timeout=timeout, limits=limits, follow_redirects=True)
+        self._rate_limit = TokenBucket(rate=config.rate_limit, burst=config.rate_limit_burst)
+        self._concurrency_limit = AIMDLimiter(
+            min_limit=config.min_concurrency,
+            max_limit=config.max_concurrency,
+            target_latency=config.target_latency_seconds,
+            decrease_factor=config.concurrency_decrease_factor,
+        )
+        self._requests_count = 0
+        self._retries_count = 0
+        self._failures_count = 0
+        self._throttled_count = 0
+        self._rate_limit_wait = 0.0
+        self._total_latency = 0.0
+
+    async def get(self, url: str, /, *, headers: Mapping[str, str] | None = None) -> httpx.Response:
+        """Send a GET request, retrying transient failures.
+
+        Returns the last response if it still has a retryable error status after all retries,
+        and raises the last `httpx.TransportError` if no response was received.
+        """
+        attempt = 0
+        while True:
+            self._rate_limit_wait += await self._rate_limit.acquire()
+            await self._concurrency_limit.acquire()
+            self._requests_count += 1
+            start = time.monotonic()
+            response: httpx.Response | None = None
+            try:
+                response = await self._client.get(url, headers=headers)
+            except httpx.TransportError:
+                if attempt >= self.config.max_retries:
+                    self._failures_count += 1
+                    raise
+            finally:
+                latency = time.monotonic() - start
+                self._total_latency += latency
+                success = response is not None and response.status_code not in RETRYABLE_STATUS_CODES
+                await self._concurrency_limit.release(latency=latency, success=success)
+            if response is not None:
+                if response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+                    self._throttled_count += 1
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                if attempt >= self.config.max_retries:
+                    self._failures_count += 1
+                    return response
+            await asyncio.sleep(self._get_backoff(attempt, response))
+            attempt += 1
+            self._retries_count += 1
+
+    def _get_backoff(self, attempt: int, response: httpx.Response | None, /) -> float:
+        # Full jitter, so that requests that failed together are not retried together.
+        delay = random.uniform(0, self.config.backoff_base_seconds * 2**attempt)  # noqa: S311
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        return min(delay, self.config.backoff_max_seconds)
+
+    def stats(self) -> ScraperStats:
+        return ScraperStats(
+            requests=self._requests_count,
+            retries=self._retries_count,
+            failures=self._failures_count,
+            throttled=self._throttled_count,
+            rate_limit_wait=self._rate_limit_wait,
+            concurrency_limit=self._concurrency_limit.limit,
+            in_flight=self._concurrency_limit.in_flight,
+            mean_latency=self._total_latency / self._requests_count if self._requests_count else 0.0,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -1,53 +1,82 @@
 from __future__ import annotations
 
 import logging
+import time
 from collections.abc import Mapping, Sequence
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal
 
 from fastapi import FastAPI, Request, status
-from fastapi.responses import HTMLResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel
 
 from ferry_planner.config import CONFIG
-from ferry_planner.connection import FerryConnection
-from ferry_planner.data import ConnectionDB, LocationDB
+from ferry_planner.connection import ConnectionId, FerryConnection
+from ferry_planner.geometry import ConnectionGeometry, GeometryStore
 from ferry_planner.location import Location, LocationId
+from ferry_planner.monitoring import EventLoopLagMonitor, EventLoopLagStats
 
 # The options imports must be outside the TYPE_CHECKING block
 # because FastAPI/Pydantic uses the type hints at runtime for validation.
 from ferry_planner.options import RoutePlansOptions, ScheduleOptions  # noqa: TC001
-from ferry_planner.route import RouteBuilder, RoutePlan, RoutePlanBuilder
-from ferry_planner.schedule import FerrySchedule, ScheduleDB
+from ferry_planner.raptor import RaptorRoutePlanBuilder
+from ferry_planner.route import RouteBuilder, RoutePlan, RoutePlanBuilder, RoutePlansSummary
+from ferry_planner.route_table import RouteTable
+from ferry_planner.schedule import FerrySchedule, ScheduleDB, ScheduleDBStats, UnavailableSchedule
+from ferry_planner.snapshot import get_source_hash, load_databases
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncGenerator, AsyncIterator
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
-    schedule_db.start_refresh_thread()
+    if CONFIG.schedules.refresh:
+        schedule_db.start_refresh()
+    event_loop_lag_monitor.start()
+    route_table.start_autosave()
     yield
+    await route_table.stop_autosave()
+    await event_loop_lag_monitor.stop()
+    await schedule_db.close()
+    geometry_store.close()
+    route_table.save()
 
 
 logging.basicConfig(level=CONFIG.log_level)
 # Disable info logs from httpx.
 logging.getLogger("httpx").setLevel(logging.WARNING)
 ROOT_DIR = Path(__file__).parent
-location_db = LocationDB.from_files(CONFIG.data.location_files)
-connection_db = ConnectionDB.from_files(CONFIG.data.connection_files, location_db=location_db)
+source_hash = get_source_hash(CONFIG.data)
+location_db, connection_db = load_databases(CONFIG.data, source_hash=source_hash)
+# Polylines are only read from disk when requested, see `api_connection_geometry`.
+geometry_store = GeometryStore(CONFIG.data.geometry_file, source_hash=source_hash)
 schedule_db = ScheduleDB(
     ferry_connections=tuple(
         connection for connection in connection_db.all() if isinstance(connection, FerryConnection)
     ),
 )
-route_builder = RouteBuilder(connection_db)
+route_table = RouteTable(
+    RouteBuilder(connection_db),
+    location_db=location_db,
+    path=CONFIG.data.route_table_file,
+    source_hash=source_hash,
+    max_pairs=CONFIG.data.route_table_max_pairs,
+    save_interval=CONFIG.data.route_table_save_interval_seconds,
+)
 route_plan_builder = RoutePlanBuilder(
     connection_db=connection_db,
     schedule_getter=schedule_db.get,
 )
+raptor_route_plan_builder = RaptorRoutePlanBuilder(
+    connection_db=connection_db,
+    schedule_getter=schedule_db.get,
+)
+event_loop_lag_monitor = EventLoopLagMonitor()
 app = FastAPI(lifespan=lifespan)
 app.mount("/static", StaticFiles(directory=ROOT_DIR / "static"), name="static")
 templates = Jinja2Templates(directory=ROOT_DIR / "templates")
@@ -73,25 +102,46 @@ async def api_locations() -> Mapping[LocationId, Location]:
     return location_db.dict()
 
 
+class ScheduleNotFound(BaseModel):
+    detail: str
+    unavailable: UnavailableSchedule | None = None
+    """Why the schedule is unavailable, if it could not be downloaded recently."""
+
+
 @app.post(
     "/api/ferry_schedule",
     response_model=FerrySchedule,
-    responses={404: {"model": Mapping[Literal["detail"], str]}},
+    responses={404: {"model": ScheduleNotFound}},
 )
 async def api_schedule(options: ScheduleOptions) -> FerrySchedule | Response:
     schedule = await schedule_db.get(options.origin, options.destination, date=options.date)
     if schedule is None:
-        return Response(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Schedule not found"})
-    return schedule
+        unavailable = schedule_db.get_unavailable(options.origin, options.destination, date=options.date)
+        headers = {}
+        if unavailable is not None:
+            retry_after = (unavailable.retry_at - datetime.now(tz=CONFIG.timezone)).total_seconds()
+            headers["Retry-After"] = str(max(0, int(retry_after)))
+        content = ScheduleNotFound(detail="Schedule not found", unavailable=unavailable)
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=content.model_dump(mode="json", exclude_none=True),
+            headers=headers,
+        )
+    return schedule.to_schedule()
+
+
+def get_route_plan_builder(options: RoutePlansOptions) -> RoutePlanBuilder | RaptorRoutePlanBuilder:
+    return raptor_route_plan_builder if options.planner == "raptor" else route_plan_builder
 
 
 @app.post("/api/routeplans", response_model=Sequence[RoutePlan])
 async def api_routeplans(options: RoutePlansOptions) -> Sequence[RoutePlan]:
     origin = location_db.by_id(options.origin)
     destination = location_db.by_id(options.destination)
-    routes = route_builder.find_routes(origin=origin, destination=destination)
+    routes = route_table.find_routes(origin=origin, destination=destination)
+    builder = get_route_plan_builder(options)
     route_plans = list(
-        await route_plan_builder.make_route_plans(
+        await builder.make_route_plans(
             routes=routes,
             options=options,
         ),
@@ -100,6 +150,55 @@ async def api_routeplans(options: RoutePlansOptions) -> Sequence[RoutePlan]:
     return route_plans
 
 
+@app.post("/api/routeplans/stream", response_class=StreamingResponse)
+async def api_routeplans_stream(options: RoutePlansOptions) -> StreamingResponse:
+    """Stream route plans as newline-delimited JSON as soon as they are planned.
+
+    Each line is `{"plan": RoutePlan}`, in no particular order, and the last line is `{"summary": RoutePlansSummary}`.
+    """
+    origin = location_db.by_id(options.origin)
+    destination = location_db.by_id(options.destination)
+    routes = route_table.find_routes(origin=origin, destination=destination)
+    builder = get_route_plan_builder(options)
+
+    async def generate() -> AsyncIterator[str]:
+        start = time.perf_counter()
+        count = 0
+        async for route_plan in builder.iter_route_plans(routes=routes, options=options):
+            count += 1
+            yield f'{{"plan":{route_plan.model_dump_json()}}}\n'
+        summary = RoutePlansSummary(count=count, elapsed=time.perf_counter() - start)
+        yield f'{{"summary":{summary.model_dump_json()}}}\n'
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+class ServerStats(BaseModel):
+    schedules: ScheduleDBStats
+    event_loop_lag: EventLoopLagStats
+
+
+@app.get("/api/stats", response_model=ServerStats)
+async def api_stats() -> ServerStats:
+    return ServerStats(schedules=schedule_db.stats(), event_loop_lag=event_loop_lag_monitor.stats())
+
+
+@app.get(
+    "/api/connections/{connection_id}/geometry",
+    response_model=ConnectionGeometry,
+    responses={404: {"model": Mapping[Literal["detail"], str]}},
+)
+async def api_connection_geometry(connection_id: ConnectionId, request: Request) -> ConnectionGeometry | Response:
+    geometry = geometry_store.get(connection_id)
+    if geometry is None:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Geometry not found"})
+    etag = f'"{geometry.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content=geometry.model_dump(mode="json"), headers=headers)
+
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, _: Exception) -> HTMLResponse:
     return templates.TemplateResponse(
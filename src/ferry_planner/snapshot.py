@@ -0,0 +1,163 @@
+"""Binary snapshot of the location and connection databases.
+
+Loading the JSON data files validates every record with Pydantic, which makes server startup slow.
+The snapshot stores the field values of the already validated models in a single `marshal` file,
+keyed by a hash of the source data files so that it is ignored once the data files change.
+Models are recreated from their stored field values without running validation.
+
+Build the snapshot with `python -m ferry_planner.snapshot`, which also builds the geometry file
+(see `ferry_planner.geometry`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from ferry_planner.config import CONFIG, DATA_MODEL_CLASS_MAP
+from ferry_planner.connection import Connection, ConnectionType
+from ferry_planner.data import ConnectionDB, LocationDB
+from ferry_planner.geometry import build_geometry_store
+from ferry_planner.location import Location
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+    from pydantic import BaseModel
+
+    from ferry_planner.config import DataConfig
+
+ModelT = TypeVar("ModelT", bound="BaseModel")
+ModelTable = tuple[str, tuple[str, ...], list[tuple[Any, ...]]]
+"""Model class name, field names and field values of each model."""
+
+SNAPSHOT_MAGIC = b"FPSNAP"
+SNAPSHOT_VERSION = 1
+"""Increment when the snapshot format or the stored models change."""
+LOCATION_CLASSES = {name: cls for name, cls in DATA_MODEL_CLASS_MAP.items() if issubclass(cls, Location)}
+CONNECTION_CLASSES = {name: cls for name, cls in DATA_MODEL_CLASS_MAP.items() if issubclass(cls, Connection)}
+
+logger = logging.getLogger(__name__)
+_object_setattr = object.__setattr__
+
+
+def get_source_hash(data_config: DataConfig, /) -> str:
+    """Get a hash of the data files, their model classes and the snapshot version."""
+    source_hash = hashlib.sha256(str(SNAPSHOT_VERSION).encode("utf-8"))
+    for data_file in (*data_config.location_files, *data_config.connection_files):
+        source_hash.update(f"{data_file.path}:{data_file.cls.__name__}".encode())
+        source_hash.update(data_file.path.read_bytes())
+    return source_hash.hexdigest()
+
+
+def _get_header(source_hash: str, /) -> bytes:
+    return SNAPSHOT_MAGIC + SNAPSHOT_VERSION.to_bytes(2, "big") + bytes.fromhex(source_hash)
+
+
+def _construct_model(cls: type[ModelT], fields: dict[str, Any], /) -> ModelT:
+    # Same as `cls.model_construct(**fields)`, which is several times slower as it handles defaults,
+    # aliases and extra fields that cannot be present in the snapshot because all fields are stored.
+    # This sets the same attributes as `BaseModel.__setstate__`.
+    model = cls.__new__(cls)
+    _object_setattr(model, "__dict__", fields)
+    _object_setattr(model, "__pydantic_fields_set__", set(fields))
+    _object_setattr(model, "__pydantic_extra__", None)
+    _object_setattr(model, "__pydantic_private__", None)
+    return model
+
+
+def _dump_models(models: Iterable[BaseModel], /) -> list[ModelTable]:
+    tables: dict[type[BaseModel], ModelTable] = {}
+    for model in models:
+        cls = type(model)
+        if cls not in tables:
+            tables[cls] = (cls.__name__, tuple(cls.model_fields), [])
+        values = []
+        for name in tables[cls][1]:
+            value = getattr(model, name)
+            if name in {"origin", "destination"}:
+                value = value.id
+            elif isinstance(value, ConnectionType):
+                value = value.value
+            values.append(value)
+        tables[cls][2].append(tuple(values))
+    return list(tables.values())
+
+
+def write_snapshot(path: Path, /, *, location_db: LocationDB, connection_db: ConnectionDB, source_hash: str) -> None:
+    payload = marshal.dumps((_dump_models(location_db.all()), _dump_models(connection_db.all())))
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(_get_header(source_hash) + payload)
+    tmp_path.replace(path)
+
+
+def read_snapshot(path: Path, /, *, source_hash: str) -> tuple[LocationDB, ConnectionDB] | None:
+    """Read a snapshot, or return `None` if it does not exist or is stale."""
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    header = _get_header(source_hash)
+    if not data.startswith(header):
+        return None
+    # The snapshot is a local build artifact created by `write_snapshot`, not untrusted input.
+    location_tables, connection_tables = marshal.loads(data[len(header) :])  # noqa: S302
+    locations: list[Location] = [
+        _construct_model(LOCATION_CLASSES[cls_name], dict(zip(names, values, strict=True)))
+        for cls_name, names, rows in location_tables
+        for values in rows
+    ]
+    locations_by_id = {location.id: location for location in locations}
+    connection_types = {connection_type.value: connection_type for connection_type in ConnectionType}
+    connections: list[Connection] = []
+    for cls_name, names, rows in connection_tables:
+        cls = CONNECTION_CLASSES[cls_name]
+        for values in rows:
+            fields = dict(zip(names, values, strict=True))
+            fields["origin"] = locations_by_id[fields["origin"]]
+            fields["destination"] = locations_by_id[fields["destination"]]
+            fields["type"] = connection_types[fields["type"]]
+            connections.append(_construct_model(cls, fields))
+    return LocationDB(locations), ConnectionDB(connections)
+
+
+def load_databases(data_config: DataConfig, /, *, source_hash: str | None = None) -> tuple[LocationDB, ConnectionDB]:
+    """Load the databases from the snapshot if it is up to date, otherwise from the JSON data files.
+
+    Pass `source_hash` if it was already computed with `get_source_hash`, to avoid reading the data files again.
+    """
+    if source_hash is None:
+        source_hash = get_source_hash(data_config)
+    databases = read_snapshot(data_config.snapshot_file, source_hash=source_hash)
+    if databases is not None:
+        return databases
+    logger.warning(
+        "data snapshot '%s' is missing or stale, loading JSON data files. "
+        "Run 'python -m ferry_planner.snapshot' to rebuild it",
+        data_config.snapshot_file,
+    )
+    location_db = LocationDB.from_files(data_config.location_files)
+    connection_db = ConnectionDB.from_files(data_config.connection_files, location_db=location_db)
+    return location_db, connection_db
+
+
+def build_snapshot(data_config: DataConfig, /) -> None:
+    source_hash = get_source_hash(data_config)
+    location_db = LocationDB.from_files(data_config.location_files)
+    connection_db = ConnectionDB.from_files(data_config.connection_files, location_db=location_db)
+    write_snapshot(
+        data_config.snapshot_file,
+        location_db=location_db,
+        connection_db=connection_db,
+        source_hash=source_hash,
+    )
+    logger.info("wrote data snapshot to '%s'", data_config.snapshot_file)
+    build_geometry_store(data_config, source_hash=source_hash)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=CONFIG.log_level)
+    build_snapshot(CONFIG.data)
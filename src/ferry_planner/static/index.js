@@ -167,6 +167,39 @@ async function fetchApiData(request, body, method = "GET") {
   return response.json();
 }
 
+async function fetchApiStream(request, body, onRecord) {
+  if (!request.startsWith("/")) {
+    request = `/${request}`;
+  }
+  const fetchOptions = {
+    method: "POST",
+    body: JSON.stringify(body),
+    headers: { "Content-Type": "application/json" },
+  };
+  const response = await fetch(`/api${request}`, fetchOptions);
+  if (!response.ok) {
+    let msg = response.statusText;
+    try {
+      const responseJson = await response.json();
+      if (responseJson?.detail) msg += ` ${JSON.stringify(responseJson.detail)}`;
+    } finally {
+      throw new Error(msg);
+    }
+  }
+  // newline-delimited JSON, one record per line
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    for (const line of lines) if (line) onRecord(JSON.parse(line));
+  }
+  if (buffer) onRecord(JSON.parse(buffer));
+}
+
 async function loadLocations() {
   locations = await fetchApiData("/locations");
 
@@ -445,34 +478,32 @@ export async function goto(hash, clickEvent) {
   saveHistory(null, hash);
 }
 
-async function getRoutePlans() {
+async function getRoutePlans(onPlans) {
   currentPlan = null;
   const options = getOptions();
-  plans = await fetchApiData("/routeplans", options, "POST");
+  plans = [];
   plans.options = options;
-
-  // pre-process plans data
   const land_groups = new Set();
-  for (let i = 0; i < plans.length; i++) {
-    const plan = plans[i];
-    plan.id = i + 1;
-    const via = new Set();
-    for (const s of plan.segments) {
-      if (s.connection.type === "FERRY") {
-        let lg = s.connection.destination.land_group;
-        if (lg) {
-          const pos = lg.indexOf(" (");
-          if (pos > 0) lg = lg.substring(0, pos).trim();
-          land_groups.add(lg);
-          via.add(lg);
-        }
-      }
+  let lastUpdate = 0;
+  let summary = null;
+  // plans are streamed in no particular order as soon as they are found
+  await fetchApiStream("/routeplans/stream", options, (record) => {
+    if (record.summary) summary = record.summary;
+    if (!record.plan) return;
+    preprocessPlan(record.plan, land_groups);
+    plans.push(record.plan);
+    record.plan.id = plans.length;
+    if (Date.now() - lastUpdate > 250) {
+      lastUpdate = Date.now();
+      onPlans();
     }
-    plan.via = Array.from(via);
-    if (plan.via.length > 1) plan.via.pop();
-    plan.origin = plan.segments[0].connection.origin;
-    plan.destination = plan.segments.slice(-1)[0].connection.destination;
-  }
+  });
+  // the summary is the last record, without it the stream was cut off and some plans are missing
+  if (!summary) throw new Error("Failed to fetch all itineraries, please try again");
+
+  // number routes in the same order as before streaming, fastest first
+  plans.sort((a, b) => a.duration - b.duration);
+  for (let i = 0; i < plans.length; i++) plans[i].id = i + 1;
 
   // delete "via" that are common for all routes
   land_groups.forEach((lg) => {
@@ -486,6 +517,25 @@ async function getRoutePlans() {
   return plans;
 }
 
+function preprocessPlan(plan, land_groups) {
+  const via = new Set();
+  for (const s of plan.segments) {
+    if (s.connection.type === "FERRY") {
+      let lg = s.connection.destination.land_group;
+      if (lg) {
+        const pos = lg.indexOf(" (");
+        if (pos > 0) lg = lg.substring(0, pos).trim();
+        land_groups.add(lg);
+        via.add(lg);
+      }
+    }
+  }
+  plan.via = Array.from(via);
+  if (plan.via.length > 1) plan.via.pop();
+  plan.origin = plan.segments[0].connection.origin;
+  plan.destination = plan.segments.slice(-1)[0].connection.destination;
+}
+
 function isValidLocation(name) {
   name = name.trim();
   return name !== " " && name in locationsToId;
@@ -508,7 +558,8 @@ async function fetchRoutes() {
       elements.inputForm.hidden = true;
       elements.loadingSpinner.hidden = false;
       //for (const element of elements.inputs) element.disabled = true;
-      plans = await getRoutePlans();
+      plans = await getRoutePlans(showPartialPlans);
+      tabsState = {};
       if (!plans) showError("Failed to fetch schedule information");
       else if (plans.length === 0) {
         showMessage("", "No itineraries found. Try select another date and/or locations.", "warning");
@@ -523,6 +574,8 @@ async function fetchRoutes() {
         showTab(elements.timelineSwitch.checked ? "tab-routes-timeline" : "tab-routes-table");
       }
     } catch (error) {
+      // do not leave the plans shown while streaming as if they were complete
+      resetState();
       showError(error.message);
     } finally {
       elements.loadingSpinner.hidden = true;
@@ -531,6 +584,18 @@ async function fetchRoutes() {
   }
 }
 
+function showPartialPlans() {
+  // show the plans found so far, the rest are added as they arrive
+  tabsState = {};
+  const sort = currentSort;
+  currentSort = null;
+  sortPlans(sort);
+  if (elements.routesCard.hidden) {
+    elements.routesCard.hidden = false;
+    showTab(elements.timelineSwitch.checked ? "tab-routes-timeline" : "tab-routes-table");
+  }
+}
+
 function secondsToString(seconds) {
   const dateObj = new Date(seconds * 1000);
   const hours = dateObj.getUTCHours();
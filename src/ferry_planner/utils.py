@@ -3,3 +3,7 @@ from datetime import datetime, time, timedelta
 
 def datetime_to_timedelta(dt: datetime | time, /) -> timedelta:
     return timedelta(hours=dt.hour, minutes=dt.minute, seconds=dt.second)
+
+
+def datetime_to_seconds(dt: datetime | time, /) -> int:
+    return dt.hour * 60 * 60 + dt.minute * 60 + dt.second